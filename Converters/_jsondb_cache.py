@@ -0,0 +1,36 @@
+# Converters/_jsondb_cache.py
+
+"""
+三个 exporter 共用的 jsondb 解析缓存。
+
+一次导出多个目标（--export-daijisho --export-esde --export-ra）时，
+同一个 jsondb/<platform>.json 会被解析 3 次；几 MB 的 gamedb 解析
+开销基本就是 exporter 的启动开销。这里按 (path, mtime_ns) 缓存，
+文件一改 mtime 变化自动失效。
+"""
+
+from functools import lru_cache
+from pathlib import Path
+import json
+
+# orjson 是可选加速项：装了就用（parse 快 2-6 倍，直接吃 bytes 免 decode），
+# 没装照常走 stdlib json。
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@lru_cache(maxsize=64)
+def _load(path_str: str, mtime_ns: int) -> dict:
+    # read_bytes 一次性读完整文件，绕开 text IO 的小缓冲增量 decode；
+    # 几十 MB 的 jsondb 上比 read_text 少大量 syscall。
+    raw = Path(path_str).read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def load_jsondb(json_path: Path) -> dict:
+    """解析 jsondb 文件，命中缓存时直接返回已解析对象。"""
+    return _load(str(json_path), json_path.stat().st_mtime_ns)
@@ -3,6 +3,20 @@
 import json
 from pathlib import Path
 
+from ._jsondb_cache import load_jsondb
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dump_json_bytes(obj) -> bytes:
+    """序列化输出 JSON（有 orjson 用 orjson，直接产出 bytes 省一次 encode）。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
 def export_daijisho(platform: str, json_path: Path, out_dir: Path):
     """
     jsondb/<platform>.json -> daijisho/<platform>.json
@@ -10,7 +24,7 @@ def export_daijisho(platform: str, json_path: Path, out_dir: Path):
     out_dir.mkdir(parents=True, exist_ok=True)
 
     # 解析 jsondb
-    data = json.loads(json_path.read_text(encoding="utf-8"))
+    data = load_jsondb(json_path)
     games = data.get("games", [])
 
     output = []
@@ -20,10 +34,7 @@ def export_daijisho(platform: str, json_path: Path, out_dir: Path):
         output.append(entry)
 
     out_path = out_dir / f"{platform}.json"
-    out_path.write_text(
-        json.dumps(output, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
+    out_path.write_bytes(_dump_json_bytes(output))
 
     print(f"[OK] Daijisho export -> {out_path}")
     return out_path
@@ -1,25 +1,91 @@
 # Converters/esde_exporter.py
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+import os
+import re
+import sys
 import json
 import shutil
 
+from ._jsondb_cache import load_jsondb
 
-def indent(elem, level=0):
-    i = "\n" + level * "  "
-    if len(elem):
-        if not elem.text or not elem.text.strip():
-            elem.text = i + "  "
-        for child in elem:
-            indent(child, level + 1)
-            if not child.tail or not child.tail.strip():
-                child.tail = i + "  "
-        if not elem[-1].tail or not elem[-1].tail.strip():
-            elem[-1].tail = i
-    else:
-        if level and (not elem.tail or not elem.tail.strip()):
-            elem.tail = i
+
+# 本次 export 里已经建过的目录，避免每个资源都打一次 mkdir/stat
+_MADE_DIRS: set[Path] = set()
+
+# ROM 文件名/厂商名绝大多数不含 XML 特殊字符，先用 C 级 regex 探一下，
+# 干净的直接原样返回，只有命中的才走 saxutils.escape 的三次 replace
+_NEEDS_ESCAPE = re.compile(r"[&<>]").search
+
+
+def _esc(s: str) -> str:
+    return escape(s) if _NEEDS_ESCAPE(s) else s
+
+
+def _ensure_dir(p: Path):
+    if p not in _MADE_DIRS:
+        p.mkdir(parents=True, exist_ok=True)
+        _MADE_DIRS.add(p)
+
+
+def _fast_copy(src: Path, dst: Path):
+    """
+    尽量走平台零拷贝路径复制文件（视频动辄上百 MB，不想经过 Python 缓冲）：
+      - Linux: os.sendfile，数据在内核里直接搬
+      - Windows: CopyFileW，同时拿到内核 copy + SMB server-side copy
+      - 其他/失败: 退回 shutil.copyfile
+    最后统一 copystat 保留 mtime（和原来 shutil.copy2 行为一致）。
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                src_fd = fsrc.fileno()
+                dst_fd = fdst.fileno()
+                total = os.fstat(src_fd).st_size
+                offset = 0
+                while offset < total:
+                    sent = os.sendfile(dst_fd, src_fd, offset, total - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+        elif sys.platform == "win32":
+            import ctypes
+
+            ok = ctypes.windll.kernel32.CopyFileW(str(src), str(dst), 0)
+            if not ok:
+                raise OSError(f"CopyFileW failed: {src} -> {dst}")
+        else:
+            shutil.copyfile(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+    shutil.copystat(src, dst)
+
+
+def _index_media_root(src_root: Path, assets_base: str) -> set[str]:
+    """一次性索引 <src_root>/<assets_base>/ 下所有文件的相对 posix 路径。
+
+    之后每个资源的存在性检查就是 set 命中，不再对每个 game 打
+    3~6 次 stat（上千个 game 在 SD 卡 / NAS 源上很疼）。
+    """
+    index: set[str] = set()
+    base = src_root / assets_base
+    stack = [base]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.is_file():
+                        rel = os.path.relpath(entry.path, src_root)
+                        index.add(rel.replace("\\", "/"))
+        except OSError:
+            continue
+    return index
 
 
 def export_esde(
@@ -27,6 +93,8 @@ def export_esde(
     json_path: Path,
     esde_root: Path,
     roms_subdir: str | None = None,
+    jobs: int | None = None,
+    mirror_relative: bool = False,
 ):
     """
     jsondb/<platform>.json -> ES-DE 结构：
@@ -41,15 +109,26 @@ def export_esde(
     roms_subdir:
       - None 或 ""  -> <path> = "./<file>"
       - "roms"      -> <path> = "./roms/<file>"
+
+    jobs:
+      媒体拷贝的并发线程数（默认 min(16, cpu*4)，拷贝是纯 IO 等待，
+      多线程对 SD 卡 / NAS 目标收益明显）
+
+    mirror_relative:
+      是否在 gamelists/<platform>/ 下再镜像一份 jsondb 相对路径的
+      media 结构（兼容其他前端）。默认关闭——ES-DE 只认
+      downloaded_media，镜像会让每个资源写两遍。
     """
 
-    data = json.loads(json_path.read_text(encoding="utf-8"))
+    data = load_jsondb(json_path)
     games = data.get("games", [])
     assets_base = data.get("assets_base", "media")
 
+    _MADE_DIRS.clear()
+
     # 1) gamelist 输出目录
     gamelist_dir = esde_root / "gamelists" / platform
-    gamelist_dir.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(gamelist_dir)
 
     # 2) downloaded_media 输出目录
     media_root = esde_root / "downloaded_media" / platform
@@ -57,97 +136,218 @@ def export_esde(
     marquees_dir = media_root / "marquees"
     videos_dir = media_root / "videos"
 
-    root = ET.Element("gameList")
+    out_path = gamelist_dir / "gamelist.xml"
 
-    for g in games:
-        game_elem = transform_to_esde(
-            platform=platform,
-            game=g,
-            assets_base=assets_base,
-            roms_subdir=roms_subdir,
-        )
-        root.append(game_elem)
+    # 流式写出：每个 <game> 构建完立刻序列化落盘，
+    # 避免整棵 gameList 树（几千个 game 时）常驻内存，
+    # 也省掉原来对全树再跑一遍的递归 indent。
+    with out_path.open("wb") as xf:
+        xf.write(b"<?xml version='1.0' encoding='utf-8'?>\n<gameList>\n")
+
+        copy_pairs: list[tuple[Path, Path]] = []
+
+        # 媒体树只扫一遍，后面的存在性检查全走 set
+        media_index = _index_media_root(json_path.parent, assets_base)
+        media_prefix = assets_base.rstrip("/") + "/"
+
+        for g in games:
+            # file 相关的名字只算一遍（纯字符串操作，不走 pathlib），
+            # XML 和媒体拷贝共用
+            file_name = g.get("file") or ""
+            file_name_only = file_name.replace("\\", "/").rsplit("/", 1)[-1]
+            rom_stem = file_name_only.rpartition(".")[0] or file_name_only
+
+            xf.write(
+                transform_to_esde(
+                    platform=platform,
+                    game=g,
+                    assets_base=assets_base,
+                    roms_subdir=roms_subdir,
+                    file_name_only=file_name_only or None,
+                ).encode("utf-8")
+            )
 
-        # === 拷贝媒体到 downloaded_media 目录 ===
-        assets = g.get("assets") or {}
-        rom_file = g.get("file") or ""
-        rom_stem = Path(rom_file).stem if rom_file else None
+            # 拷贝任务先收集，XML 写完后统一并发执行
+            _collect_game_asset_pairs(
+                g,
+                rom_stem=rom_stem or None,
+                json_path=json_path,
+                gamelist_dir=gamelist_dir,
+                covers_dir=covers_dir,
+                marquees_dir=marquees_dir,
+                videos_dir=videos_dir,
+                pairs=copy_pairs,
+                mirror_relative=mirror_relative,
+                media_index=media_index,
+                media_prefix=media_prefix,
+            )
 
-        if not rom_stem:
-            continue
+        xf.write(b"</gameList>\n")
 
-        # 封面 -> covers/<ROM名>.<原后缀>
-        box_front = assets.get("box_front")
-        if box_front:
-            _copy_asset_to_named(
-                src_root=json_path.parent,
-                rel_path=box_front,
-                dst_dir=covers_dir,
-                out_basename=rom_stem,
-            )
+    _run_copy_jobs(copy_pairs, jobs=jobs)
 
-        # logo -> marquees/<ROM名>.<原后缀>
-        logo = assets.get("logo")
-        if logo:
-            _copy_asset_to_named(
-                src_root=json_path.parent,
-                rel_path=logo,
-                dst_dir=marquees_dir,
-                out_basename=rom_stem,
-            )
+    print(f"[OK] ES-DE export -> {out_path}")
+    return out_path
 
-        # 视频 -> videos/<ROM名>.<原后缀>
-        video = assets.get("video")
-        if video:
-            _copy_asset_to_named(
-                src_root=json_path.parent,
-                rel_path=video,
-                dst_dir=videos_dir,
-                out_basename=rom_stem,
-            )
 
-        # === 可选：保持一份相对 gamelist 的 media 结构（兼容其他前端） ===
-        for key in ("box_front", "logo", "video"):
-            rel = assets.get(key)
-            if not rel:
-                continue
-            _copy_asset_relative(
-                src_root=json_path.parent,
-                dst_root=gamelist_dir,
-                rel_path=rel,
-            )
+def _run_copy_jobs(pairs: list[tuple[Path, Path]], jobs: int | None = None):
+    """
+    并发执行收集好的 (src, dst) 拷贝。
 
-    indent(root)
+    单个 game 最多 6 次同步 copy，上千个 game 就是几千次串行 IO 等待；
+    线程池让拷贝受限于目标盘带宽而不是逐个 round-trip。
+    """
+    if not pairs:
+        return
 
-    out_path = gamelist_dir / "gamelist.xml"
-    tree = ET.ElementTree(root)
-    tree.write(out_path, encoding="utf-8", xml_declaration=True)
+    # 去重：同一个源文件（多碟游戏共享 logo 之类）只真正拷一次，
+    # 其余目标直接 hard link 到第一份，省掉重复读写。
+    seen: dict[Path, Path] = {}
+    copy_jobs: list[tuple[Path, Path]] = []
+    link_jobs: list[tuple[Path, Path]] = []
+
+    for src, dst in pairs:
+        first_dst = seen.get(src)
+        if first_dst is None:
+            seen[src] = dst
+            copy_jobs.append((src, dst))
+        elif dst != first_dst:
+            link_jobs.append((first_dst, dst))
+
+    # 目标目录先一次性建好，避免线程里 mkdir 互相踩
+    for parent in {dst.parent for _, dst in pairs}:
+        _ensure_dir(parent)
+
+    max_workers = jobs or min(16, (os.cpu_count() or 4) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda p: _fast_copy(*p), copy_jobs))
+
+    for first_dst, dst in link_jobs:
+        try:
+            if dst.exists():
+                dst.unlink()
+            os.link(first_dst, dst)
+        except OSError:
+            # 跨设备 / 文件系统不支持 hard link 时退回普通拷贝
+            _fast_copy(first_dst, dst)
+
+
+def _collect_game_asset_pairs(
+    g: dict,
+    rom_stem: str | None,
+    json_path: Path,
+    gamelist_dir: Path,
+    covers_dir: Path,
+    marquees_dir: Path,
+    videos_dir: Path,
+    pairs: list,
+    mirror_relative: bool = False,
+    media_index: set[str] | None = None,
+    media_prefix: str = "media/",
+):
+    """收集单个 game 的媒体拷贝任务（downloaded_media + 相对 gamelist 的兼容结构）。"""
+    # === 拷贝媒体到 downloaded_media 目录 ===
+    assets = g.get("assets") or {}
 
-    print(f"[OK] ES-DE export -> {out_path}")
-    return out_path
+    if not rom_stem:
+        return
+
+    # 封面 -> covers/<ROM名>.<原后缀>
+    box_front = assets.get("box_front")
+    if box_front:
+        _add_named_asset_pair(
+            src_root=json_path.parent,
+            rel_path=box_front,
+            dst_dir=covers_dir,
+            out_basename=rom_stem,
+            pairs=pairs,
+            media_index=media_index,
+            media_prefix=media_prefix,
+        )
+
+    # logo -> marquees/<ROM名>.<原后缀>
+    logo = assets.get("logo")
+    if logo:
+        _add_named_asset_pair(
+            src_root=json_path.parent,
+            rel_path=logo,
+            dst_dir=marquees_dir,
+            out_basename=rom_stem,
+            pairs=pairs,
+            media_index=media_index,
+            media_prefix=media_prefix,
+        )
+
+    # 视频 -> videos/<ROM名>.<原后缀>
+    video = assets.get("video")
+    if video:
+        _add_named_asset_pair(
+            src_root=json_path.parent,
+            rel_path=video,
+            dst_dir=videos_dir,
+            out_basename=rom_stem,
+            pairs=pairs,
+            media_index=media_index,
+            media_prefix=media_prefix,
+        )
+
+    # === 可选：保持一份相对 gamelist 的 media 结构（兼容其他前端） ===
+    if not mirror_relative:
+        return
+
+    for key in ("box_front", "logo", "video"):
+        rel = assets.get(key)
+        if not rel:
+            continue
+        _add_relative_asset_pair(
+            src_root=json_path.parent,
+            dst_root=gamelist_dir,
+            rel_path=rel,
+            pairs=pairs,
+            media_index=media_index,
+            media_prefix=media_prefix,
+        )
 
 
-def _copy_asset_relative(src_root: Path, dst_root: Path, rel_path: str):
+def _src_present(
+    src_root: Path,
+    rel: str,
+    media_index: set[str] | None,
+    media_prefix: str,
+) -> bool:
+    """媒体树内的路径查索引 set；树外（罕见）退回单次 stat。"""
+    if media_index is not None and rel.startswith(media_prefix):
+        return rel in media_index
+    return (src_root / rel).is_file()
+
+
+def _add_relative_asset_pair(
+    src_root: Path,
+    dst_root: Path,
+    rel_path: str,
+    pairs: list,
+    media_index: set[str] | None = None,
+    media_prefix: str = "media/",
+):
     """
     老逻辑：按 jsondb 里记录的相对路径复制到平台 gamelist 目录下，
     比如 ./media/xxx -> gamelists/<platform>/media/xxx
     """
     rel = rel_path.lstrip("./").replace("\\", "/")
-    src = (src_root / rel).resolve()
-    dst = dst_root / rel
-
-    if not src.is_file():
+    if not _src_present(src_root, rel, media_index, media_prefix):
         return
 
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy2(src, dst)
+    pairs.append((src_root / rel, dst_root / rel))
 
 
-def _copy_asset_to_named(
+def _add_named_asset_pair(
     src_root: Path,
     rel_path: str,
     dst_dir: Path,
     out_basename: str,
+    pairs: list,
+    media_index: set[str] | None = None,
+    media_prefix: str = "media/",
 ):
     """
     ES-DE 正式用的 copy：
@@ -159,14 +359,33 @@ def _copy_asset_to_named(
       封面: box_front.png -> copied to covers/MHP3rd.png
     """
     rel = rel_path.lstrip("./").replace("\\", "/")
-    src = (src_root / rel).resolve()
-    if not src.is_file():
+    if not _src_present(src_root, rel, media_index, media_prefix):
         return
 
-    dst_dir.mkdir(parents=True, exist_ok=True)
-    ext = src.suffix.lower()
+    base = rel.rsplit("/", 1)[-1]
+    dot = base.rfind(".")
+    ext = base[dot:].lower() if dot > 0 else ""
     dst = dst_dir / f"{out_basename}{ext}"
-    shutil.copy2(src, dst)
+    pairs.append((src_root / rel, dst))
+
+
+def _add(pairs: list, tag: str, text):
+    """非空字段收集成 (tag, value)，供模板拼接。"""
+    if text is None:
+        return
+    s = str(text).strip()
+    if not s:
+        return
+    pairs.append((tag, s))
+
+
+def _norm_rel(path: str | None):
+    if not path:
+        return None
+    p = path.replace("\\", "/")
+    if not p.startswith("./") and not p.startswith("/"):
+        p = "./" + p
+    return p
 
 
 def transform_to_esde(
@@ -174,78 +393,70 @@ def transform_to_esde(
     game: dict,
     assets_base: str,
     roms_subdir: str | None = None,
-) -> ET.Element:
+    file_name_only: str | None = None,
+) -> str:
     """
-    构造一个 <game> element。
+    构造一个 <game> 文本块（已缩进、已转义，直接可写入 gamelist.xml）。
+
+    file_name_only 可由调用方预先算好传入（export_esde 的热循环），
+    不传则在这里从 file 字段推导。
       - name
       - path
       - sortname
       - desc
       - developer / publisher
       - image / marquee / video（兼容用，ES-DE 主用 downloaded_media）
-    """
-    game_elem = ET.Element("game")
 
-    def add(tag: str, text):
-        if text is None:
-            return
-        s = str(text).strip()
-        if not s:
-            return
-        elem = ET.SubElement(game_elem, tag)
-        elem.text = s
+    字段都是纯文本、没有属性，直接拼字符串比 Element/SubElement
+    每个 game 省掉 ~20 次对象分配，几千个 game 时很可观。
+    """
+    pairs: list[tuple[str, str]] = []
 
     # name：优先 game，其次 canonical_name，再不行用 file 顶上
     name = game.get("game") or game.get("canonical_name") or game.get("file")
-    add("name", name)
+    _add(pairs, "name", name)
 
     # path：ES-DE 的 ROM 相对路径
     file_name = game.get("file")
     if file_name:
-        file_name_only = Path(file_name).name
+        if file_name_only is None:
+            file_name_only = file_name.replace("\\", "/").rsplit("/", 1)[-1]
         sub = (roms_subdir or "").strip().replace("\\", "/")
         if sub:
             rel_path = f"./{sub}/{file_name_only}"
         else:
             rel_path = f"./{file_name_only}"
-        add("path", rel_path)
+        _add(pairs, "path", rel_path)
 
     # sortname：用 sort_by 保证排序稳定
     sort_by = game.get("sort_by")
     if sort_by:
-        add("sortname", f"{sort_by} {name}")
+        _add(pairs, "sortname", f"{sort_by} {name}")
 
     # desc：把 \n 还原成真正换行
     desc = game.get("description")
     if desc:
-        add("desc", desc.replace("\\n", "\n"))
+        _add(pairs, "desc", desc.replace("\\n", "\n"))
 
     # developer / publisher
     dev = game.get("developer")
     if dev:
-        add("developer", dev)
-        add("publisher", dev)
+        _add(pairs, "developer", dev)
+        _add(pairs, "publisher", dev)
 
     # === 媒体 tag（兼容） ===
     assets = game.get("assets") or {}
 
-    def norm_rel(path: str | None):
-        if not path:
-            return None
-        p = path.replace("\\", "/")
-        if not p.startswith("./") and not p.startswith("/"):
-            p = "./" + p
-        return p
-
-    image = norm_rel(assets.get("box_front"))
-    marquee = norm_rel(assets.get("logo"))
-    video = norm_rel(assets.get("video"))
+    image = _norm_rel(assets.get("box_front"))
+    marquee = _norm_rel(assets.get("logo"))
+    video = _norm_rel(assets.get("video"))
 
     if image:
-        add("image", image)
+        _add(pairs, "image", image)
     if marquee:
-        add("marquee", marquee)
+        _add(pairs, "marquee", marquee)
     if video:
-        add("video", video)
+        _add(pairs, "video", video)
 
-    return game_elem
+    body = "".join(f"    <{t}>{_esc(v)}</{t}>\n" for t, v in pairs)
+    return f"  <game>\n{body}  </game>\n"
@@ -1,10 +1,18 @@
 # Converters/retroarch_exporter.py
 
+import hashlib
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+
+from ._jsondb_cache import load_jsondb
 from typing import Any, Dict
 
 
+# 文件名里不适合出现的字符，一次 translate 单趟替换完
+_BAD_CHARS_TABLE = str.maketrans({c: "_" for c in '/\\:*?"<>|'})
+
 # 一些针对安卓 RA 的默认 per-game override，可以按需增减
 DEFAULT_ANDROID_OVERRIDES: Dict[str, Any] = {
     # 典型安卓场景：不启用 overlay，避免误触
@@ -18,6 +26,22 @@ DEFAULT_ANDROID_OVERRIDES: Dict[str, Any] = {
 }
 
 
+_CFG_HASH_CACHE_NAME = ".pegasus_cfg_hashes.json"
+
+
+def _load_cfg_hashes(out_dir: Path) -> dict:
+    cache_path = out_dir / _CFG_HASH_CACHE_NAME
+    try:
+        return json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cfg_hashes(out_dir: Path, hashes: dict) -> None:
+    cache_path = out_dir / _CFG_HASH_CACHE_NAME
+    cache_path.write_text(json.dumps(hashes, indent=2), encoding="utf-8")
+
+
 def export_retroarch(platform: str, json_path: Path, out_dir: Path):
     """
     从 jsondb 生成 RetroArch 的 per-game override（安卓可用版本）。
@@ -40,20 +64,45 @@ def export_retroarch(platform: str, json_path: Path, out_dir: Path):
     if not json_path.is_file():
         raise FileNotFoundError(f"json_path not found: {json_path}")
 
-    data = json.loads(json_path.read_text(encoding="utf-8"))
+    data = load_jsondb(json_path)
     games = data.get("games", [])
     if not isinstance(games, list):
         raise ValueError(f"json.games 必须是 list，当前类型: {type(games)}")
 
-    generated = 0
-    skipped_no_core = 0
+    # core 目录集合远小于 game 数，先串行建好，
+    # build_override 里就不用每个 game 都 mkdir 一次
+    cores = {g.get("core_override") for g in games if g.get("core_override")}
+    for core in cores:
+        (out_dir / core).mkdir(parents=True, exist_ok=True)
 
-    for g in games:
-        cfg_path = build_override(platform, g, out_dir)
-        if cfg_path is None:
-            skipped_no_core += 1
-        else:
-            generated += 1
+    # 内容哈希缓存：重复导出时内容没变的 cfg 直接跳过，不碰磁盘
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cfg_hashes = _load_cfg_hashes(out_dir)
+
+    def _export_one(g: dict) -> bool:
+        built = build_override(platform, g, out_dir)
+        if built is None:
+            return False
+        cfg_path, body = built
+
+        key = str(cfg_path.relative_to(out_dir))
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        if cfg_hashes.get(key) == digest and cfg_path.exists():
+            return True
+
+        _write_cfg_bytes(cfg_path, body)
+        cfg_hashes[key] = digest
+        return True
+
+    # 每个 cfg 互相独立、纯 IO，写几千个小文件时线程池能把
+    # 逐个 open/write/close 的等待摊平
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(_export_one, games))
+
+    generated = sum(results)
+    skipped_no_core = len(results) - generated
+
+    _save_cfg_hashes(out_dir, cfg_hashes)
 
     print(
         f"[OK] RetroArch override export complete for {platform} | "
@@ -61,9 +110,22 @@ def export_retroarch(platform: str, json_path: Path, out_dir: Path):
     )
 
 
-def build_override(platform: str, game: dict, out_dir: Path) -> Path | None:
+def _write_cfg_bytes(cfg_path: Path, body: bytes) -> None:
     """
-    为单个 game 生成 per-game override cfg。
+    用 os.open + 单次 os.write 落盘（比 write_text 少一层 text IO 包装，
+    也省掉按字符串再 encode 的一步；上千个 cfg 时 syscall 数量差很多）。
+    """
+    fd = os.open(cfg_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, body)
+    finally:
+        os.close(fd)
+
+
+def build_override(platform: str, game: dict, out_dir: Path) -> tuple[Path, bytes] | None:
+    """
+    为单个 game 构建 per-game override cfg，返回 (cfg_path, body_bytes)；
+    没有 core_override 的条目返回 None。写盘由调用方统一处理。
 
     目录结构会被生成为：
         out_dir / <core_override> / <content_name>.cfg
@@ -77,16 +139,13 @@ def build_override(platform: str, game: dict, out_dir: Path) -> Path | None:
         return None
 
     cfg_dir = out_dir / core
-    cfg_dir.mkdir(parents=True, exist_ok=True)
 
     filename_base = _infer_content_name(game)
     filename = f"{filename_base}.cfg"
     cfg_path = cfg_dir / filename
 
-    # 1. 先合并默认安卓 override
-    cfg_dict: Dict[str, Any] = dict(DEFAULT_ANDROID_OVERRIDES)
-
-    # 2. 合并 game 级别 override（完全覆盖同名 key）
+    # 1+2. 默认安卓 override 和 game 级别 override 一次合并完成
+    # （同名 key 由 game 覆盖），避免每个 game 先 copy 默认 dict 再 update。
     # 支持两种字段名，方便你在 jsondb 里折腾：
     #   - "ra_override"
     #   - "retroarch_override"
@@ -100,7 +159,7 @@ def build_override(platform: str, game: dict, out_dir: Path) -> Path | None:
             f"game.ra_override 必须是 dict，当前类型: {type(game_override)}，game={game!r}"
         )
 
-    cfg_dict.update(game_override)
+    cfg_dict: Dict[str, Any] = {**DEFAULT_ANDROID_OVERRIDES, **game_override}
 
     # 3. 写入 cfg
     lines = [
@@ -115,8 +174,8 @@ def build_override(platform: str, game: dict, out_dir: Path) -> Path | None:
         ra_value = _normalize_ra_value(value)
         lines.append(f'{key} = "{ra_value}"')
 
-    cfg_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    return cfg_path
+    body = ("\n".join(lines) + "\n").encode("utf-8")
+    return cfg_path, body
 
 
 def _infer_content_name(game: dict) -> str:
@@ -144,10 +203,7 @@ def _infer_content_name(game: dict) -> str:
             name = "unknown"
 
     # Android 文件名里出现 / : 之类，保险起见还是替换掉
-    bad_chars = '/\\:*?"<>|'
-    for ch in bad_chars:
-        name = name.replace(ch, "_")
-    name = name.strip()
+    name = name.translate(_BAD_CHARS_TABLE).strip()
     return name or "unknown"
 
 
@@ -18,14 +18,81 @@
 - roms 在界面中用逗号分隔字符串表示，保存时会写回为 list[str]
 """
 
+import hashlib
 import json
+import pickle
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
+# ijson 可选：装了就流式解析 games（峰值内存 O(1 game)），
+# 没装退回整文件 json.load
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# orjson 可选：保存大 jsondb 时序列化走 C，快好几倍
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 JSONDB_DIR = Path("jsondb")
 
 
+def _load_payload(path: Path) -> dict:
+    """
+    读 jsondb。有 ijson 时单遍流式解析：顶层字段照常收集，
+    games 逐条 append，不会像 json.load 那样把中间对象撑到
+    文件体积的 ~3 倍。
+    """
+    if ijson is None:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    payload: dict = {}
+    games: list = []
+    top_key: str | None = None
+    builder = None
+
+    with path.open("rb") as f:
+        for prefix, event, value in ijson.parse(f):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == builder_prefix and event in (
+                    "end_map", "end_array", "string",
+                    "number", "boolean", "null",
+                ):
+                    if top_key == "games":
+                        games.append(builder.value)
+                    else:
+                        payload[top_key] = builder.value
+                    builder = None
+                continue
+
+            if prefix == "" and event == "map_key":
+                top_key = value
+            elif top_key == "games" and prefix == "games.item" and event == "start_map":
+                builder = ijson.ObjectBuilder()
+                builder_prefix = "games.item"
+                builder.event(event, value)
+            elif top_key is not None and top_key != "games" and prefix == top_key:
+                if event in ("start_map", "start_array"):
+                    builder = ijson.ObjectBuilder()
+                    builder_prefix = top_key
+                    builder.event(event, value)
+                elif event in ("string", "number", "boolean", "null"):
+                    payload[top_key] = value
+
+    payload["games"] = games
+    return payload
+
+# Treeview 一次只挂这么多行（虚拟窗口），几千个 game 的 ps2.json
+# 才不会在 populate 时整卡几秒
+PAGE_ROWS = 200
+
+
 class JsonDbInspector(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -40,12 +107,26 @@ class JsonDbInspector(tk.Tk):
         self.dirty: bool = False
         self._suspend_dirty = False
         self._select_lock = False
+        self._dirty_after_id: str | None = None
+
+        # Raw JSON 预序列化缓存：id(game) -> (版本号, 文本)
+        self._raw_cache: dict[int, tuple[int, str]] = {}
+        self._game_versions: dict[int, int] = {}
+        # 保存用的 per-game 序列化片段缓存（同样按版本失效）
+        self._dump_cache: dict[int, tuple[int, str]] = {}
+        # 上一次渲染过 hash 表的 game（apply 后重选同一行时直接跳过）
+        self._last_hash_key: tuple[int, int] | None = None
 
         # 右侧额外视图
         self.fields: dict = {}
         self.hash_tree: ttk.Treeview | None = None
         self.raw_text: tk.Text | None = None
 
+        # 虚拟列表状态：模型在 self.games，Treeview 只挂可见窗口
+        self._row_values: list[tuple] = []
+        self._created_iids: set[str] = set()
+        self._win_first = 0
+
         self._build_ui()
 
     def _set_field(self, key, value):
@@ -55,8 +136,13 @@ class JsonDbInspector(tk.Tk):
         if isinstance(widget, tk.StringVar):
             widget.set(value if value is not None else "")
         elif isinstance(widget, tk.Text):
-            widget.delete("1.0", tk.END)
-            widget.insert(tk.END, value if value is not None else "")
+            # replace 一次 Tk 调用顶 delete+insert 两次，还省掉
+            # 中间空文本那帧重绘（Tk 8.6+；老 Tk 退回两段式）
+            try:
+                widget.replace("1.0", tk.END, value if value is not None else "")
+            except tk.TclError:
+                widget.delete("1.0", tk.END)
+                widget.insert(tk.END, value if value is not None else "")
 
     # ---------------- UI 构建 ----------------
     def _build_ui(self):
@@ -99,11 +185,17 @@ class JsonDbInspector(tk.Tk):
 
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        scrollbar = ttk.Scrollbar(left_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # 滚动条走代理：拖动换算成全局行号翻页，Tree 内部滚动
+        # 再换算回全局比例显示
+        scrollbar = ttk.Scrollbar(left_frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self._vsb_set = scrollbar.set
+        self.tree.configure(yscrollcommand=self._on_tree_yscroll)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", self._on_mousewheel)
+        self.tree.bind("<Button-5>", self._on_mousewheel)
 
         # 右侧：用 Notebook 分三块
         right_frame = ttk.Frame(main_pane)
@@ -145,12 +237,12 @@ class JsonDbInspector(tk.Tk):
         add_field("开发者 (developer)", "developer", 6)
         add_field("简介 (description)", "description", 7, multiline=True)
 
-        # 编辑时标记 dirty
+        # 编辑时标记 dirty（合并到 idle 再刷状态栏，不跟着每个按键重绘）
         for key, widget in self.fields.items():
             if isinstance(widget, tk.StringVar):
-                widget.trace_add("write", lambda *args: self._mark_dirty())
+                widget.trace_add("write", lambda *args: self._schedule_dirty())
             elif isinstance(widget, tk.Text):
-                widget.bind("<Key>", lambda event: self._mark_dirty())
+                widget.bind("<Key>", lambda event: self._schedule_dirty())
 
         ttk.Button(
             form_frame,
@@ -158,9 +250,29 @@ class JsonDbInspector(tk.Tk):
             command=self.on_apply_current
         ).pack(side=tk.BOTTOM, anchor=tk.E, pady=4, padx=8)
 
-        # Tab 2: ROM Hashes 只读表格
-        hash_frame = ttk.Frame(notebook, padding=8)
-        notebook.add(hash_frame, text="ROM Hashes")
+        # Tab 2 / Tab 3 只挂占位 Frame，第一次切过去才真正建
+        # Treeview / Text（只编辑基本信息时省掉这截启动开销）
+        self._hash_frame = ttk.Frame(notebook, padding=8)
+        notebook.add(self._hash_frame, text="ROM Hashes")
+
+        self._raw_frame = ttk.Frame(notebook, padding=8)
+        notebook.add(self._raw_frame, text="Raw JSON")
+
+        self.notebook = notebook
+        notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+    def _on_tab_changed(self, event):
+        tab = self.notebook.select()
+        if not tab:
+            return
+        widget = self.nametowidget(tab)
+        if widget is self._hash_frame and self.hash_tree is None:
+            self._build_hash_tab()
+        elif widget is self._raw_frame and self.raw_text is None:
+            self._build_raw_tab()
+
+    def _build_hash_tab(self):
+        hash_frame = self._hash_frame
 
         hash_columns = ("rom_rel", "exists", "size", "md5_header", "sha256_full")
         self.hash_tree = ttk.Treeview(
@@ -187,9 +299,12 @@ class JsonDbInspector(tk.Tk):
         self.hash_tree.configure(yscrollcommand=hash_scrollbar.set)
         hash_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        # Tab 3: Raw JSON 全字段只读
-        raw_frame = ttk.Frame(notebook, padding=8)
-        notebook.add(raw_frame, text="Raw JSON")
+        # 补渲染当前选中的 game（建 tab 之前的选中事件被跳过了）
+        if self.current_index is not None and 0 <= self.current_index < len(self.games):
+            self._update_hash_view(self.games[self.current_index])
+
+    def _build_raw_tab(self):
+        raw_frame = self._raw_frame
 
         self.raw_text = tk.Text(raw_frame, wrap=tk.NONE)
         self.raw_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -200,6 +315,9 @@ class JsonDbInspector(tk.Tk):
         raw_scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
         raw_scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
 
+        if self.current_index is not None and 0 <= self.current_index < len(self.games):
+            self._update_raw_json(self.games[self.current_index])
+
     # ---------------- 事件处理 ----------------
 
     def _mark_dirty(self):
@@ -208,6 +326,19 @@ class JsonDbInspector(tk.Tk):
         self.dirty = True
         self.status_var.set(f"{self.json_path} (已修改但未保存)")
 
+    def _schedule_dirty(self):
+        """按键连击时把 N 次状态栏刷新合并成 1 次（150ms 去抖）。"""
+        if self._suspend_dirty or self.payload is None:
+            return
+        self.dirty = True
+        if self._dirty_after_id is None:
+            self._dirty_after_id = self.after(150, self._flush_dirty_status)
+
+    def _flush_dirty_status(self):
+        self._dirty_after_id = None
+        if self.dirty:
+            self.status_var.set(f"{self.json_path} (已修改但未保存)")
+
     def on_open(self):
         # 默认指向 jsondb 目录
         initial_dir = JSONDB_DIR if JSONDB_DIR.exists() else Path.cwd()
@@ -222,36 +353,143 @@ class JsonDbInspector(tk.Tk):
         self.load_json(Path(path))
 
     def load_json(self, path: Path):
+        # side-car pickle 缓存：重复打开同一个 ps2.json 时，
+        # 反序列化已解析好的对象比重新 parse 缩进 JSON 快好几倍。
+        # mtime_ns 不匹配即作废；保存时也会主动删掉。
+        pkl_path = path.with_name(path.name + ".pkl")
+        payload = None
         try:
-            with path.open("r", encoding="utf-8") as f:
-                payload = json.load(f)
-        except Exception as e:
-            messagebox.showerror("错误", f"读取 JSON 失败：{e}")
-            return
+            mtime_ns = path.stat().st_mtime_ns
+            if pkl_path.is_file():
+                with pkl_path.open("rb") as f:
+                    cached = pickle.load(f)
+                if cached.get("mtime_ns") == mtime_ns:
+                    payload = cached["payload"]
+        except Exception:
+            payload = None
+
+        if payload is None:
+            try:
+                payload = _load_payload(path)
+            except Exception as e:
+                messagebox.showerror("错误", f"读取 JSON 失败：{e}")
+                return
+            try:
+                with pkl_path.open("wb") as f:
+                    pickle.dump(
+                        {"mtime_ns": mtime_ns, "payload": payload},
+                        f,
+                        protocol=pickle.HIGHEST_PROTOCOL,
+                    )
+            except OSError:
+                pass  # 只读目录等场景：没缓存照常工作
 
         self.json_path = path
         self.payload = payload
         self.games = payload.get("games", [])
         self.dirty = False
+        # 载入时记一份内容指纹：保存时指纹没变就不落盘
+        # （dirty 标记会被光标键/程序性赋值误触发，指纹才是真相）
+        self._loaded_hash = self._payload_hash()
+        self._raw_cache.clear()
+        self._game_versions.clear()
+        self._dump_cache.clear()
+        self._last_hash_key = None
 
         self.status_var.set(str(self.json_path))
         self.populate_tree()
         self.clear_form()
 
+    def _payload_hash(self) -> str:
+        """payload 的规范化 JSON sha256，用于保存前的真实变更检测。"""
+        canon = json.dumps(self.payload, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _game_row(g: dict) -> tuple:
+        """左侧列表一行的 values（populate / apply / add 共用）。"""
+        return (g.get("id", ""), g.get("game", ""), g.get("file", ""), g.get("sort_by", ""))
+
     def populate_tree(self):
         self.tree.unbind("<<TreeviewSelect>>")
 
-        self.tree.delete(*self.tree.get_children())
-        for idx, g in enumerate(self.games):
-            self.tree.insert(
-                "",
-                "end",
-                iid=str(idx),
-                values=(g.get("id", ""), g.get("game", ""), g.get("file", ""), g.get("sort_by", "")),
-            )
+        # 每行的 values 只算一次，翻页/回滚复用
+        self._row_values = [self._game_row(g) for g in self.games]
+        # 复用已建行：Tk 侧 item 记录保留，item(values=...) 改值
+        # 比 delete 全表再 insert 便宜得多；多出来的行才真正销毁
+        for iid in self.tree.get_children():
+            self.tree.detach(iid)
+        n = len(self._row_values)
+        stale = [iid for iid in self._created_iids if int(iid) >= n]
+        if stale:
+            self.tree.delete(*stale)
+            self._created_iids.difference_update(stale)
+        for iid in self._created_iids:
+            self.tree.item(iid, values=self._row_values[int(iid)])
+        self._win_first = 0
+        self._render_window(0)
 
         self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
 
+    # ---------------- 虚拟列表（窗口渲染） ----------------
+
+    def _render_window(self, first: int):
+        """只把 [first, first+PAGE_ROWS) 这段挂到 Treeview 上。"""
+        n = len(self._row_values)
+        first = max(0, min(first, max(0, n - PAGE_ROWS)))
+        last = min(n, first + PAGE_ROWS)
+
+        for iid in self.tree.get_children():
+            self.tree.detach(iid)
+
+        for pos, idx in enumerate(range(first, last)):
+            iid = str(idx)
+            if iid in self._created_iids:
+                self.tree.move(iid, "", pos)
+            else:
+                self.tree.insert("", pos, iid=iid, values=self._row_values[idx])
+                self._created_iids.add(iid)
+
+        self._win_first = first
+
+    def _ensure_row_visible(self, idx: int):
+        """保证第 idx 行在当前窗口里（选中/定位前调用）。"""
+        n = len(self._row_values)
+        if not (0 <= idx < n):
+            return
+        if not (self._win_first <= idx < self._win_first + len(self.tree.get_children())):
+            self._render_window(idx - PAGE_ROWS // 2)
+        self.tree.see(str(idx))
+
+    def _on_tree_yscroll(self, lo, hi):
+        """Tree 内部滚动比例 → 全局比例，喂给滚动条。"""
+        n = len(self._row_values) or 1
+        wlen = len(self.tree.get_children()) or 1
+        self._vsb_set(
+            (self._win_first + float(lo) * wlen) / n,
+            (self._win_first + float(hi) * wlen) / n,
+        )
+
+    def _on_scrollbar(self, *args):
+        """滚动条操作 → 全局行号，重新渲染窗口。"""
+        n = len(self._row_values)
+        if not n:
+            return
+        if args[0] == "moveto":
+            self._render_window(int(float(args[1]) * n))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            step = PAGE_ROWS if args[2] == "pages" else 3
+            self._render_window(self._win_first + amount * step)
+
+    def _on_mousewheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            step = -3
+        else:
+            step = 3
+        self._render_window(self._win_first + step)
+        return "break"
+
     def clear_form(self):
         self._suspend_dirty = True
         try:
@@ -293,6 +531,13 @@ class JsonDbInspector(tk.Tk):
     def _update_hash_view(self, game: dict):
         if self.hash_tree is None:
             return
+
+        # rom_hashes 是只读数据；同一个 game（同版本）重复选中不用重填表
+        key = (id(game), self._game_versions.get(id(game), 0))
+        if key == self._last_hash_key:
+            return
+        self._last_hash_key = key
+
         self.hash_tree.delete(*self.hash_tree.get_children())
 
         rom_hashes = game.get("rom_hashes") or []
@@ -322,31 +567,53 @@ class JsonDbInspector(tk.Tk):
     def _update_raw_json(self, game: dict):
         if self.raw_text is None:
             return
-        self.raw_text.delete("1.0", tk.END)
+
+        # 选中没编辑过的 game 时直接用缓存文本，
+        # 长 rom_hashes 的 json.dumps 不用每次点击都重跑
+        key = id(game)
+        version = self._game_versions.get(key, 0)
+        cached = self._raw_cache.get(key)
+        if cached is not None and cached[0] == version:
+            raw = cached[1]
+        else:
+            try:
+                raw = json.dumps(game, ensure_ascii=False, indent=2)
+            except Exception as e:
+                raw = f"<< JSON 序列化失败: {e} >>"
+            self._raw_cache[key] = (version, raw)
+
+        if self.raw_text.get("1.0", tk.END).rstrip("\n") == raw:
+            return
         try:
-            raw = json.dumps(game, ensure_ascii=False, indent=2)
-        except Exception as e:
-            raw = f"<< JSON 序列化失败: {e} >>"
-        self.raw_text.insert(tk.END, raw)
+            self.raw_text.replace("1.0", tk.END, raw)
+        except tk.TclError:
+            self.raw_text.delete("1.0", tk.END)
+            self.raw_text.insert(tk.END, raw)
 
     def load_game_to_form(self, game: dict):
         self._suspend_dirty = True
         try:
-            self._set_field("id", game.get("id", ""))
-            self._set_field("game", game.get("game", ""))
-            self._set_field("canonical_name", game.get("canonical_name", game.get("game", "")))
-            self._set_field("file", game.get("file", ""))
-
-            roms = game.get("roms")
+            # get / _set_field 绑定一次局部，8 个字段就省 8 组
+            # LOAD_METHOD；选中行切换是跟着按键走的高频路径
+            get = game.get
+            set_field = self._set_field
+
+            name = get("game", "")
+            set_field("id", get("id", ""))
+            set_field("game", name)
+            set_field("canonical_name", get("canonical_name") or name)
+            set_field("file", get("file", ""))
+
+            roms = get("roms")
             if isinstance(roms, list):
                 roms_text = ", ".join(str(r) for r in roms)
             else:
                 roms_text = ""
-            self._set_field("roms", roms_text)
+            set_field("roms", roms_text)
 
-            self._set_field("sort_by", game.get("sort_by", ""))
-            self._set_field("developer", game.get("developer", ""))
-            self._set_field("description", game.get("description", ""))
+            set_field("sort_by", get("sort_by", ""))
+            set_field("developer", get("developer", ""))
+            set_field("description", get("description", ""))
 
             # 更新 ROM Hashes & Raw JSON 视图
             self._update_hash_view(game)
@@ -371,18 +638,24 @@ class JsonDbInspector(tk.Tk):
                 return widget.get("1.0", tk.END).strip()
             return ""
         
-        game_name = get_text_field("game") or game.get("game", "")
+        old_name = game.get("game", "")
+        game_name = get_text_field("game") or old_name
         game["game"] = game_name
         game["canonical_name"] = get_text_field("canonical_name") or game["game"]
         game["file"] = get_text_field("file") or game.get("file", "")
 
         # 确保 assets 存在
-        if "assets" not in game or not isinstance(game["assets"], dict):
-            game["assets"] = {}
-
-        game["assets"]["box_front"] = f"media/{game_name}/boxfront.png"
-        game["assets"]["logo"] = f"media/{game_name}/logo.png"
-        game["assets"]["video"] = f"media/{game_name}/video.mp4"
+        assets = game.get("assets")
+        if not isinstance(assets, dict):
+            assets = game["assets"] = {}
+
+        # 名字没变且路径已是 media/<name>/ 规范时跳过重建；
+        # apply 多数是改别的字段，省下三次拼串 + 三次字典写
+        prefix = f"media/{game_name}/"
+        if game_name != old_name or not assets.get("box_front", "").startswith(prefix):
+            assets["box_front"] = prefix + "boxfront.png"
+            assets["logo"] = prefix + "logo.png"
+            assets["video"] = prefix + "video.mp4"
 
         roms_text = get_text_field("roms")
         if roms_text:
@@ -409,11 +682,17 @@ class JsonDbInspector(tk.Tk):
         elif "description" in game:
             game.pop("description", None)
 
-        # 更新列表显示（左侧）
-        self.populate_tree()
-        if 0 <= self.current_index < len(self.games):
-            self.tree.selection_set(str(self.current_index))
-            self.tree.see(str(self.current_index))
+        # 内容变了，让 Raw JSON 缓存失效
+        self._game_versions[id(game)] = self._game_versions.get(id(game), 0) + 1
+
+        # 更新列表显示（左侧）：只刷新这一行，不整表重建
+        idx = self.current_index
+        self._row_values[idx] = self._game_row(game)
+        iid = str(idx)
+        if iid in self._created_iids:
+            self.tree.item(iid, values=self._row_values[idx])
+        self._ensure_row_visible(idx)
+        self.tree.selection_set(iid)
 
         # 同步更新 Raw JSON / hashes 视图（因为 game 已变）
         self._update_hash_view(game)
@@ -436,13 +715,14 @@ class JsonDbInspector(tk.Tk):
             }
         }
         self.games.append(new_game)
-        self.populate_tree()
+        # 追加单行：值缓存补一条，窗口渲染挪到末尾即可
+        self._row_values.append(self._game_row(new_game))
 
         new_index = len(self.games) - 1
         self.current_index = new_index
         self.load_game_to_form(new_game)
+        self._ensure_row_visible(new_index)
         self.tree.selection_set(str(new_index))
-        self.tree.see(str(new_index))
         self._mark_dirty()
 
     def on_delete_game(self):
@@ -461,6 +741,44 @@ class JsonDbInspector(tk.Tk):
         self.clear_form()
         self._mark_dirty()
 
+    def _game_fragment(self, game: dict) -> str:
+        """单个 game 的已缩进 JSON 片段（嵌在 "games": [...] 里）。"""
+        key = id(game)
+        version = self._game_versions.get(key, 0)
+        cached = self._dump_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        if orjson is not None:
+            txt = orjson.dumps(game, option=orjson.OPT_INDENT_2).decode("utf-8")
+        else:
+            txt = json.dumps(game, ensure_ascii=False, indent=2)
+        txt = "\n".join("    " + ln for ln in txt.splitlines())
+        self._dump_cache[key] = (version, txt)
+        return txt
+
+    def _assemble_payload_bytes(self) -> bytes:
+        """
+        增量组装输出：games 以外的顶层字段整体序列化一次，
+        每个 game 用缓存片段拼接——只编辑过一条时，兆级的
+        未改动部分不会重新 json.dumps。
+        """
+        head = {k: v for k, v in self.payload.items() if k != "games"}
+        head_txt = json.dumps(head, ensure_ascii=False, indent=2)
+
+        games_txt = ",\n".join(self._game_fragment(g) for g in self.games)
+        if games_txt:
+            games_block = '"games": [\n' + games_txt + "\n  ]"
+        else:
+            games_block = '"games": []'
+
+        if head:
+            # 去掉收尾的 "\n}"，把 games 拼在最后
+            body = head_txt[:-2] + ",\n  " + games_block + "\n}"
+        else:
+            body = "{\n  " + games_block + "\n}"
+        return (body + "\n").encode("utf-8")
+
     def on_save(self):
         if self.payload is None or self.json_path is None:
             messagebox.showinfo("提示", "请先打开一个 jsondb 文件。")
@@ -471,14 +789,26 @@ class JsonDbInspector(tk.Tk):
 
         self.payload["games"] = self.games
 
+        # 内容指纹没变（比如只动过光标、或改回了原值）就不重写文件，
+        # pickle 缓存也得以保留
+        current_hash = self._payload_hash()
+        if current_hash == getattr(self, "_loaded_hash", None):
+            self.dirty = False
+            self.status_var.set(f"{self.json_path} (无变更)")
+            messagebox.showinfo("提示", "内容没有变化，无需保存。")
+            return
+
         try:
-            with self.json_path.open("w", encoding="utf-8") as f:
-                json.dump(self.payload, f, ensure_ascii=False, indent=2)
+            self.json_path.write_bytes(self._assemble_payload_bytes())
         except Exception as e:
             messagebox.showerror("错误", f"保存失败：{e}")
             return
 
+        # 文件内容变了，side-car pickle 缓存作废
+        self.json_path.with_name(self.json_path.name + ".pkl").unlink(missing_ok=True)
+
         self.dirty = False
+        self._loaded_hash = current_hash
         self.status_var.set(f"{self.json_path} (已保存)")
         messagebox.showinfo("成功", "已保存到原 JSON 文件。")
 
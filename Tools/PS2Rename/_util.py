@@ -0,0 +1,12 @@
+# Tools/PS2Rename/_util.py
+
+"""PS2Rename 各脚本共用的小工具。"""
+
+
+def ensure_chd(name: str) -> str:
+    """没有 .chd 后缀就补上。
+
+    只 lower 最后 4 个字符：整串 lower 会为每个 key 多分配一份
+    全长拷贝，而后缀判断只关心结尾。
+    """
+    return name if name[-4:].lower() == ".chd" else name + ".chd"
@@ -1,7 +1,64 @@
 import json
+import sys
 from pathlib import Path, PurePosixPath
 from rename_ps2_chd import load_name_mapping
 
+# ijson 可选：有就流式读 games，ps2.json 很大时峰值内存低得多
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# orjson 可选：写回时序列化走 C
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _read_jsondb(jsondb_path: Path) -> dict:
+    if ijson is None:
+        with jsondb_path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    payload: dict = {}
+    games: list = []
+    top_key = None
+    builder = None
+    builder_prefix = None
+
+    with jsondb_path.open("rb") as f:
+        for prefix, event, value in ijson.parse(f):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == builder_prefix and event in (
+                    "end_map", "end_array", "string",
+                    "number", "boolean", "null",
+                ):
+                    if top_key == "games":
+                        games.append(builder.value)
+                    else:
+                        payload[top_key] = builder.value
+                    builder = None
+                continue
+
+            if prefix == "" and event == "map_key":
+                top_key = value
+            elif top_key == "games" and prefix == "games.item" and event == "start_map":
+                builder = ijson.ObjectBuilder()
+                builder_prefix = "games.item"
+                builder.event(event, value)
+            elif top_key is not None and top_key != "games" and prefix == top_key:
+                if event in ("start_map", "start_array"):
+                    builder = ijson.ObjectBuilder()
+                    builder_prefix = top_key
+                    builder.event(event, value)
+                elif event in ("string", "number", "boolean", "null"):
+                    payload[top_key] = value
+
+    payload["games"] = games
+    return payload
+
 
 def _infer_media_stem(game: dict) -> str | None:
     # 1) 优先从 file 推（仅当是纯数字）
@@ -27,7 +84,7 @@ def _infer_media_stem(game: dict) -> str | None:
 
 
 
-def _fix_assets_paths(game: dict, media_stem: str | None) -> None:
+def _fix_assets_paths(game: dict, media_stem: str | None, log: list[str] | None = None) -> None:
     """
     按“数字编号目录”规范矫正 assets：
     一律改成 media/<old_stem>/xxx，而不跟随新的 file 名字。
@@ -39,23 +96,31 @@ def _fix_assets_paths(game: dict, media_stem: str | None) -> None:
     if not isinstance(assets, dict):
         return
 
+    # 大多数条目本来就已是 media/<stem>/... 规范前缀，
+    # 先用一次 startswith 放过去，不必进 split/join
+    want_prefix = "media/" + media_stem + "/"
+
     for k, v in list(assets.items()):
         if not isinstance(v, str):
             continue
 
-        p = PurePosixPath(v)
-        parts = list(p.parts)
+        if v.startswith(want_prefix):
+            continue
 
-        # 只处理以 "media/..." 开头的路径
-        if len(parts) >= 2 and parts[0] == "media":
-            rest = parts[2:]  # 去掉原来的第二段（无论是中文名还是数字）
-            new_p = PurePosixPath("media") / media_stem
-            for comp in rest:
-                new_p /= comp
-            new_path = str(new_p)
+        # 只处理以 "media/..." 开头的路径；纯字符串拆拼，
+        # 不为每条 asset 造 PurePosixPath（热循环里贵一个量级）
+        if v.startswith("media/"):
+            rest = v.split("/", 2)  # ["media", 老第二段, 其余]
+            new_path = "media/" + media_stem
+            if len(rest) > 2:
+                new_path += "/" + rest[2]
             if new_path != v:
                 assets[k] = new_path
-                print(f"[assets] {v} -> {new_path}")
+                msg = f"[assets] {v} -> {new_path}"
+                if log is None:
+                    print(msg)
+                else:
+                    log.append(msg)
 
 
 def apply_to_jsondb(jsondb_path: Path, mapping: dict[str, str]) -> None:
@@ -63,57 +128,68 @@ def apply_to_jsondb(jsondb_path: Path, mapping: dict[str, str]) -> None:
     按 mapping 重写 jsondb 中的 file / roms / rom_hashes[*].rom_rel，
     同时把 assets 目录统一矫正为 media/<数字编号>/xxx。
     """
-    with jsondb_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = _read_jsondb(jsondb_path)
 
     games = data.get("games", [])
     changed = 0
 
+    # 逐条 print 在几千条命中时 TTY flush 会拖慢整个循环，
+    # 统一攒起来最后一次性输出
+    log: list[str] = []
+
+    # 热循环里的全局/方法查找提到局部：每次 LOAD_GLOBAL/LOAD_METHOD
+    # 换成 LOAD_FAST，乘上 N*(roms+hashes) 次就不是零头了
+    _get = mapping.get
+    _log = log.append
+    _isinstance = isinstance
+    _infer = _infer_media_stem
+
     for g in games:
         # 保存旧的 file 名（用来提取数字编号）
         old_file = g.get("file")
-        old_stem = _infer_media_stem(g)
-        if isinstance(old_file, str) and old_file:
+        old_stem = _infer(g)
+        if _isinstance(old_file, str) and old_file:
             # 只取文件名最后一段，然后去掉扩展名
             fname = old_file.split("/")[-1]
             old_stem = fname.rsplit(".", 1)[0]  # 例如 "506.chd" -> "506"
 
-        # 1) file 字段
-        if old_file in mapping:
-            new_file = mapping[old_file]
-            if new_file != old_file:
-                g["file"] = new_file
-                changed += 1
-                print(f"[file] {old_file} -> {new_file}")
+        # 1) file 字段（get 一次拿到，省掉 in + [] 两次查表）
+        new_file = _get(old_file)
+        if new_file is not None and new_file != old_file:
+            g["file"] = new_file
+            changed += 1
+            _log(f"[file] {old_file} -> {new_file}")
 
-        # 2) roms 数组
+        # 2) roms 数组：没命中就不新建 list
         roms = g.get("roms")
-        if isinstance(roms, list):
-            new_roms = []
-            updated = False
-            for r in roms:
-                if r in mapping:
-                    nr = mapping[r]
-                    new_roms.append(nr)
-                    updated = True
-                    print(f"[roms] {r} -> {nr}")
-                else:
-                    new_roms.append(r)
-            if updated:
+        if _isinstance(roms, list):
+            new_roms = None
+            for i, r in enumerate(roms):
+                nr = _get(r)
+                if nr is None or nr == r:
+                    continue
+                if new_roms is None:
+                    new_roms = list(roms)
+                new_roms[i] = nr
+                _log(f"[roms] {r} -> {nr}")
+            if new_roms is not None:
                 g["roms"] = new_roms
 
         # 3) rom_hashes 数组
         rh_list = g.get("rom_hashes")
-        if isinstance(rh_list, list):
+        if _isinstance(rh_list, list):
             for rh in rh_list:
                 rrel = rh.get("rom_rel")
-                if rrel in mapping:
-                    nr = mapping[rrel]
+                nr = _get(rrel)
+                if nr is not None and nr != rrel:
                     rh["rom_rel"] = nr
-                    print(f"[rom_hashes] {rrel} -> {nr}")
+                    _log(f"[rom_hashes] {rrel} -> {nr}")
 
         # 4) 统一矫正 assets 路径 -> media/<old_stem>/xxx
-        _fix_assets_paths(g, old_stem)
+        _fix_assets_paths(g, old_stem, log)
+
+    if log:
+        sys.stdout.write("\n".join(log) + "\n")
 
     # 先备份（仅第一次备份，不覆盖老备份）
     bak_path = jsondb_path.with_suffix(jsondb_path.suffix + ".bak")
@@ -122,8 +198,11 @@ def apply_to_jsondb(jsondb_path: Path, mapping: dict[str, str]) -> None:
         print(f"🧷 已备份：{bak_path}")
     
     # 直接覆盖写回原文件
-    with jsondb_path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        jsondb_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with jsondb_path.open("w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
     print(f"\n✅ 已写回 {jsondb_path.name}，共修改 {changed} 条 game.file")
 
 
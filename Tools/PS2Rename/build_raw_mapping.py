@@ -1,23 +1,41 @@
 from pathlib import Path
 import json
+import re
+
+from _util import ensure_chd
+
+# 多碟 key："043 Disc A  描述..."，一次 DFA 匹配替代逐 token 判断
+MULTI_DISC_RE = re.compile(r"^(\d+\s+Disc\s+[AB12])(?:\s+(.*))?$", re.IGNORECASE)
 
 
 def parse_mapping_from_txt(txt_path: Path) -> dict[str, str]:
     mapping: dict[str, str] = {}
 
-    with txt_path.open("r", encoding="utf-8-sig") as f:
-        for raw_line in f:
-            line = raw_line.strip()
-            if not line:
-                continue
-            if line.startswith("#") or line.startswith("//"):
-                continue
+    # 整文件一次读进来再 splitlines：跳过 TextIOWrapper 的
+    # 逐行增量 decode 和 universal-newlines 状态机
+    text = txt_path.read_bytes().decode("utf-8-sig")
 
-            # 跳过表头/噪音行：例如 "chd\tXXXX"
-            low = line.lower()
-            if low.startswith("chd") and ("\t" in line or " " in line):
-                continue
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        if line[0] == "#" or line.startswith("//"):
+            continue
+
+        # 跳过表头/噪音行：例如 "chd\tXXXX"
+        # （只 lower 前 3 个字符，不为每行整串 lower 一遍）
+        if line[:3].lower() == "chd" and ("\t" in line or " " in line):
+            continue
 
+        # 特判：数字 + Disc + A/B/1/2 这种多碟 key（预编译正则一次搞定；
+        # 先看首字符是不是数字，大多数行根本不用进正则）
+        m = MULTI_DISC_RE.match(line) if line[0].isdigit() else None
+        if m:
+            key_raw = " ".join(m.group(1).split())
+            desc_raw = (m.group(2) or "").strip()
+            if not desc_raw:
+                continue
+        else:
             # 优先用 TAB 分割（更像“字段”）
             if "\t" in line:
                 key_raw, desc_raw = line.split("\t", 1)
@@ -34,35 +52,19 @@ def parse_mapping_from_txt(txt_path: Path) -> dict[str, str]:
                 continue
 
             key_raw = tokens[0]
-            desc_tokens = tokens[1:]
-
-            # 特判：数字 + Disc + A/B/1/2 这种多碟 key
-            if (
-                len(tokens) >= 3
-                and tokens[0].isdigit()
-                and tokens[1].lower() == "disc"
-                and tokens[2].upper() in {"A", "B", "1", "2"}
-            ):
-                key_raw = " ".join(tokens[:3])          # "043 Disc A"
-                desc_tokens = tokens[3:] or [""]
-
-            desc_raw = " ".join(desc_tokens).strip()
+            desc_raw = " ".join(tokens[1:]).strip()
             if not desc_raw:
                 continue
 
-            key = key_raw.strip()
-
-            # 允许 key 只有数字：033 -> 033.chd
-            if key.isdigit():
-                key = f"{key}.chd"
+        key = key_raw.strip()
 
-            # 普通 key：补 .chd 后缀
-            if not key.lower().endswith(".chd"):
-                key = key + ".chd"
+        # 允许 key 只有数字：033 -> 033.chd；普通 key 补 .chd 后缀
+        # （数字分支结果必然带后缀，不用再判断一次）
+        key = f"{key}.chd" if key.isdigit() else ensure_chd(key)
 
-            if key in mapping:
-                print(f"[警告] 重复条目 {key}，将覆盖之前的值。")
-            mapping[key] = desc_raw
+        if key in mapping:
+            print(f"[警告] 重复条目 {key}，将覆盖之前的值。")
+        mapping[key] = desc_raw
 
     return mapping
 
@@ -87,7 +89,8 @@ def main():
         # 合并：后读的覆盖先读的（你也可以反过来）
         merged.update(m)
 
-    mapping_sorted = dict(sorted(merged.items(), key=lambda kv: kv[0]))
+    # 只排 key，不 materialize (k, v) 元组列表
+    mapping_sorted = {k: merged[k] for k in sorted(merged)}
 
     with out_path.open("w", encoding="utf-8") as f:
         json.dump(mapping_sorted, f, ensure_ascii=False, indent=2)
@@ -1,7 +1,23 @@
 from pathlib import Path
 import json
 import re
-from collections import OrderedDict
+
+# orjson 可选：映射表几千条时 parse/序列化快好几倍，没装走 stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _loads_file(p: Path) -> dict:
+    raw = p.read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+# 排序 key 每个条目都要算一次，正则提到模块级预编译
+_NUM_PREFIX = re.compile(r"(\d+)")
+
 
 def chd_sort_key(k: str):
     """
@@ -11,7 +27,7 @@ def chd_sort_key(k: str):
     """
 
     # 提取主编号
-    m = re.match(r"(\d+)", k)
+    m = _NUM_PREFIX.match(k)
     if m:
         num = int(m.group(1))
     else:
@@ -19,8 +35,8 @@ def chd_sort_key(k: str):
 
     lk = k.lower()
 
-    # 类型权重
-    if re.fullmatch(r"\d+\.chd", lk):
+    # 类型权重（“纯数字.chd”用字符串判断就够，不必进正则引擎）
+    if lk.endswith(".chd") and lk[:-4].isdigit():
         kind = 0
     elif "disc" in lk:
         kind = 1
@@ -39,14 +55,12 @@ def main():
     if not raw_path.is_file():
         raise SystemExit(f"找不到 ps2_raw_mapping.json: {raw_path}")
 
-    with raw_path.open("r", encoding="utf-8") as f:
-        raw = json.load(f)
+    raw = _loads_file(raw_path)
 
     # 关键：如果已有 ps2_mapping_redump.json，就读进来当“人工权威缓存”
     existing = {}
     if out_path.is_file():
-        with out_path.open("r", encoding="utf-8") as f:
-            existing = json.load(f)
+        existing = _loads_file(out_path)
 
     changed = 0
     for k in sorted(raw.keys()):
@@ -63,14 +77,22 @@ def main():
                 existing[k] = {"cn": cn.strip(), "en": ""}
                 changed += 1
 
-    sorted_existing = OrderedDict(
-        (k, existing[k])
-        for k in sorted(existing.keys(), key=chd_sort_key)
-    )
-    
+    # 3.7+ 普通 dict 本来就保序，不用 OrderedDict 的链表节点开销
+    sorted_existing = {k: existing[k] for k in sorted(existing, key=chd_sort_key)}
+
+    # 没补任何条目、顺序也没变：不重写文件，省一次大 JSON 序列化
+    # + 网络写，mtime 不动下游工具也不会白白重新 parse
+    if changed == 0 and out_path.is_file() and list(existing) == list(sorted_existing):
+        print("无改动，跳过写回。")
+        return
+
     # 写回：不会把你手工 en 清空
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(sorted_existing, f, ensure_ascii=False, indent=2)
+    # （不能用 OPT_SORT_KEYS——顺序必须保持 chd_sort_key 的结果）
+    if orjson is not None:
+        out_path.write_bytes(orjson.dumps(sorted_existing, option=orjson.OPT_INDENT_2))
+    else:
+        with out_path.open("w", encoding="utf-8") as f:
+            json.dump(sorted_existing, f, ensure_ascii=False, indent=2)
 
     print(f"增量补齐 {changed} 条。")
 
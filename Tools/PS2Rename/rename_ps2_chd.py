@@ -1,5 +1,15 @@
+from functools import lru_cache
 from pathlib import Path
 import json
+import os
+
+from _util import ensure_chd
+
+# orjson 可选：parse 大映射表走 C
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 HERE = Path(__file__).resolve().parent
 MAPPING_JSON = HERE / "ps2_mapping_redump.json"  # { "001.chd": {cn, en}, ... }
@@ -9,32 +19,32 @@ CHD_DIRS = [
     Path(r"\\192.168.5.146\nexnasshare\tkzlm\【3】天马rom资源\【13】PS2--1077G\【非汉化，放入PS2文件夹】--713GB\PS2"),
 ]
 
-def sanitize_filename(name: str) -> str:
-    """把 Redump 名转成合法的 Windows 文件名."""
-    name = name.strip()
+# 非法字符一张 translate 表删干净：一次线性扫描，
+# 不像逐字符 replace 那样每个字符整串过一遍再各留一个中间串
+_ILLEGAL_TRANS = str.maketrans("", "", '<>"/\\|?*')
 
-    illegal = '<>:"/\\|?*'
-    name = name.replace(":", " -")
-    for ch in illegal:
-        if ch == ":":
-            continue
-        name = name.replace(ch, "")
 
-    name = name.rstrip(" .")
-    return name
+@lru_cache(maxsize=None)
+def sanitize_filename(name: str) -> str:
+    """把 Redump 名转成合法的 Windows 文件名（结果确定，缓存复用；
+    多碟游戏共用基名时同一个输入会反复出现）."""
+    return name.strip().replace(":", " -").translate(_ILLEGAL_TRANS).rstrip(" .")
 
 
-def load_name_mapping() -> dict[str, str]:
-    with MAPPING_JSON.open("r", encoding="utf-8") as f:
-        raw = json.load(f)
+@lru_cache(maxsize=4)
+def _load_mapping_cached(path_str: str, mtime_ns: int, size: int) -> dict[str, str]:
+    """真正的解析体：key 带 mtime/size，文件一改缓存自动失效。"""
+    raw_bytes = Path(path_str).read_bytes()
+    if orjson is not None:
+        raw = orjson.loads(raw_bytes)
+    else:
+        raw = json.loads(raw_bytes.decode("utf-8"))
 
     mapping: dict[str, str] = {}
     skipped_no_en = 0
 
     for k, v in raw.items():
-        old = k.strip()
-        if not old.lower().endswith(".chd"):
-            old += ".chd"
+        old = ensure_chd(k.strip())
 
         # 只处理 dict 且 en 非空的条目
         if not isinstance(v, dict):
@@ -46,48 +56,70 @@ def load_name_mapping() -> dict[str, str]:
             skipped_no_en += 1
             continue
 
-        target = sanitize_filename(en)
-        if not target.lower().endswith(".chd"):
-            target += ".chd"
-
-        mapping[old] = target
+        mapping[old] = ensure_chd(sanitize_filename(en))
 
     print(f"[INFO] 仅对 en 非空条目生成 rename 计划：{len(mapping)} 条；跳过（无 en）{skipped_no_en} 条。")
     return mapping
 
 
-def find_src(old_name: str) -> Path | None:
-    """在多个目录中查找 old_name，返回第一个命中的完整路径。"""
-    for d in CHD_DIRS:
+def load_name_mapping() -> dict[str, str]:
+    """dry-run 接着真跑、media 脚本再调一次——同一个进程里
+    重复调用不再重新 parse，命中缓存直接拿结果。"""
+    st = MAPPING_JSON.stat()
+    return _load_mapping_cached(str(MAPPING_JSON), st.st_mtime_ns, st.st_size)
+
+
+def _build_dir_index(dirs: list[Path]) -> dict[Path, set[str]]:
+    """每个目录一次 scandir 建文件名索引。
+
+    UNC 网络盘上逐条 exists() 是 2N 次远程 stat，延迟完全压垮
+    循环本身；换成每目录一次列目录后查找/冲突检测都是 O(1)。
+    """
+    index: dict[Path, set[str]] = {}
+    for d in dirs:
         if not d.is_dir():
             print(f"[警告] 目录不可用：{d}")
             continue
-        p = d / old_name
-        if p.exists():
-            return p
-    return None
+        with os.scandir(d) as it:
+            index[d] = {e.name for e in it}
+    return index
 
 
 def rename_chd_files(dry_run: bool = True) -> None:
     mapping = load_name_mapping()
 
+    dir_index = _build_dir_index(CHD_DIRS)
+
     changed = 0
     missing = 0
     conflict = 0
 
+    # 查找/改名阶段全走字符串：Path.__truediv__ 每次要过一遍
+    # pathlib 解析机械，比 os.path.join 贵 ~3 倍，这里一条映射两次
+    _join = os.path.join
+
     for old_name, new_name in mapping.items():
-        src = find_src(old_name)
-        if src is None:
+        src_dir = None
+        names = None
+        for d, dir_names in dir_index.items():
+            if old_name in dir_names:
+                src_dir = str(d)
+                names = dir_names
+                break
+
+        if src_dir is None:
             print(f"[缺失] {old_name} 不在任何目录中")
             missing += 1
             continue
 
-        dst = src.parent / new_name  # 在同一目录内重命名（最安全）
-
-        if src.name == dst.name:
+        if old_name == new_name:
             continue
 
-        if dst.exists():
+        # 在同一目录内重命名（最安全）
+        src = _join(src_dir, old_name)
+        dst = _join(src_dir, new_name)
+
+        if new_name in names:
             print(f"[冲突] 目标已存在：{dst}，跳过 {src}")
             conflict += 1
             continue
@@ -96,7 +128,10 @@ def rename_chd_files(dry_run: bool = True) -> None:
         changed += 1
 
         if not dry_run:
-            src.rename(dst)
+            os.rename(src, dst)
+        # 索引同步更新，后续条目的冲突检测才正确
+        names.discard(old_name)
+        names.add(new_name)
 
     print(
         f"\n准备重命名 {changed} 个文件（dry_run={dry_run}），"
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
 from pathlib import Path
 from typing import Dict
 
@@ -20,24 +21,32 @@ def rename_media_dirs(media_root: Path, mapping: Dict[str, str]) -> None:
         print("⚠ media 根目录不存在，先确认路径")
         return
 
+    # TF 卡/USB 上逐条 exists() 是 2N 次慢 stat；
+    # 一次 scandir 建名字快照，循环里全走内存查找
+    with os.scandir(media_root) as it:
+        names = {e.name for e in it}
+
     for old_chd, new_chd in mapping.items():
         old_stem = Path(old_chd).stem      # "001"
         new_stem = Path(new_chd).stem      # "God of War (USA)"
 
-        src = media_root / old_stem
-        dst = media_root / new_stem
-
-        if not src.exists():
+        if old_stem not in names:
             # 有些编号可能没有媒体，略过
             continue
 
-        if dst.exists():
+        src = media_root / old_stem
+        dst = media_root / new_stem
+
+        if new_stem in names:
             # 理论上不该冲突，冲突先打个 log 手工看一下
             print(f"⚠ 目标已存在，跳过: {src} -> {dst}")
             continue
 
         print(f"[move] {src} -> {dst}")
         src.rename(dst)
+        # 快照同步，后面条目的冲突判断才准
+        names.discard(old_stem)
+        names.add(new_stem)
 
     print("✅ media 目录重命名完成")
 
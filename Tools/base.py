@@ -3,10 +3,30 @@ import unicodedata
 import re
 import os
 import json
+from collections import Counter
 from typing import Dict, Any, Tuple
 
-from .metadata_scanner import parse_pegasus_metadata
-from .metadata_writer import dump_pegasus_metadata
+from functools import lru_cache
+
+from .metadata_scanner import parse_pegasus_metadata, parse_pegasus_text
+from .metadata_writer import dump_pegasus_metadata, dumps_pegasus_metadata
+
+
+@lru_cache(maxsize=128)
+def _parse_cached(path: str, mtime_ns: int):
+    """按 (path, mtime_ns) 缓存首次 parse；同一 metadata 反复验证时
+    只有 dump 出来的临时文件才真正重新解析。"""
+    return parse_pegasus_metadata(path)
+
+
+# _clean_text 在闭合性验证时每条 rom / description 都要跑，
+# 尽量压成少数几次 C 级扫描：
+#  - 零宽字符 + 隐形换行（\u2028/\u2029）用一张 translate 表删除
+#  - \r\n / 孤立 \r 统一成 \n（不能进 translate：\r→\n 会把 \r\n 变成双换行）
+#  - 行尾空白一次正则扫掉，不再 split 成 list 逐行 rstrip 再 join
+_ZW_TABLE = {ord(c): None for c in "\u200B\u200C\u200D\uFEFF\u2028\u2029"}
+_CRLF_RE = re.compile(r"\r\n?")
+_TRAIL_WS_RE = re.compile(r"[^\S\n]+\n")
 
 
 def _clean_text(s: str) -> str:
@@ -16,18 +36,14 @@ def _clean_text(s: str) -> str:
     # 1) Unicode normalization NFKC（全角/半角 + 合字规范化）
     s = unicodedata.normalize("NFKC", s)
 
-    # 2) 去掉所有零宽字符
-    s = re.sub(r"[\u200B\u200C\u200D\uFEFF]", "", s)
+    # 2) 一次扫描删掉零宽字符和隐形换行符
+    s = s.translate(_ZW_TABLE)
 
-    # 3) 去掉 unicode 中隐形换行符
-    s = s.replace("\u2028", "").replace("\u2029", "")
+    # 3) 标准化换行
+    s = _CRLF_RE.sub("\n", s)
 
-    # 4) 标准化换行（全部变成 \n）
-    s = s.replace("\r\n", "\n").replace("\r", "\n")
-
-    # 5) 去掉末尾空行和末尾空白
-    lines = [ln.rstrip() for ln in s.split("\n")]
-    return "\n".join(lines).strip()
+    # 4) 行尾空白 + 首尾空行
+    return _TRAIL_WS_RE.sub("\n", s).strip()
 
 def _normalize_header(h: Dict[str, Any]) -> Dict[str, Any]:
     """用于闭合性测试的 header 语义归一化。"""
@@ -77,23 +93,10 @@ def _normalize_game(g: Dict[str, Any]) -> Dict[str, Any]:
     if isinstance(roms, str):
         roms = [roms]
 
-    cleaned_roms = []
-    for r in roms:
-        if not r:
-            continue
-        s = r.strip()
-        if not s:
-            continue
-        cleaned_roms.append(s)
-
-    # 去重 + 排序
-    cleaned_roms = []
-    for r in roms:
-        if not r: continue
-        s = _clean_text(r.strip())
-        if s:
-            cleaned_roms.append(s)
-    norm["roms"] = sorted(set(cleaned_roms))
+    # 清洗 + 去重 + 排序走 C 级管道：生成器算清洗值，
+    # filter(None) 丢空串，FOR_ITER 不再逐项回到字节码 if/continue
+    cleaned = filter(None, (_clean_text(r.strip()) for r in roms if r))
+    norm["roms"] = sorted(set(cleaned))
 
     # description：去掉行末空格 & 首尾空行
     desc = g.get("description")
@@ -128,6 +131,64 @@ def _game_key(g: Dict[str, Any]) -> Tuple[str, str]:
     return (name, rom0)
 
 
+def _closure_compare(h1, g1, h2, g2) -> Tuple[bool, bool]:
+    """语义归一化后比较两轮 parse 结果，返回 (header 相同, games 相同)。"""
+    nh1 = _normalize_header(h1 or {})
+    nh2 = _normalize_header(h2 or {})
+    is_header_same = (nh1 == nh2)
+
+    g1_norm = [_normalize_game(g) for g in g1]
+    g2_norm = [_normalize_game(g) for g in g2]
+
+    # 等价性判断用规范 JSON 的多重集合：O(N) hash 比较，
+    # 不用先做两次 O(N log N) 排序再逐 dict 结构比较
+    sig1 = Counter(json.dumps(g, sort_keys=True, ensure_ascii=False) for g in g1_norm)
+    sig2 = Counter(json.dumps(g, sort_keys=True, ensure_ascii=False) for g in g2_norm)
+    is_games_same = (sig1 == sig2)
+
+    if not is_games_same:
+        # 只有失败时才排序找第一条差异（调试路径，不在乎慢）
+        g1_sorted = sorted(g1_norm, key=_game_key)
+        g2_sorted = sorted(g2_norm, key=_game_key)
+        print("[DEBUG] 找第一条不相等的 game：")
+        for a, b in zip(g1_sorted, g2_sorted):
+            if a != b:
+                print("game1 =", json.dumps(a, ensure_ascii=False, indent=2))
+                print("game2 =", json.dumps(b, ensure_ascii=False, indent=2))
+                break
+
+    return is_header_same, is_games_same
+
+
+def _report_closure(meta_desc, h1, g1, h2, g2, is_header_same, is_games_same) -> bool:
+    print("---- 闭合性检查 ----")
+    print("header 相同：", is_header_same)
+    print("games  相同：", is_games_same)
+
+    ok = is_header_same and is_games_same
+
+    if not ok:
+        print("\n[DIFF] 发现差异，可前往调试：")
+        print("header1 =", json.dumps(h1, indent=2, ensure_ascii=False))
+        print("header2 =", json.dumps(h2, indent=2, ensure_ascii=False))
+        print("games1_count =", len(g1))
+        print("games2_count =", len(g2))
+
+    return ok
+
+
+def verify_closure_inmem(meta_path: str) -> bool:
+    """
+    闭合性验证的纯内存版：parse → dumps 成字符串 → parse_pegasus_text，
+    不写临时文件。语义与 verify_closure 一致，少一次磁盘写和一次磁盘读。
+    """
+    h1, g1 = _parse_cached(meta_path, os.stat(meta_path).st_mtime_ns)
+    text = dumps_pegasus_metadata(h1, g1)
+    h2, g2 = parse_pegasus_text(text)
+    is_header_same, is_games_same = _closure_compare(h1, g1, h2, g2)
+    return _report_closure(meta_path, h1, g1, h2, g2, is_header_same, is_games_same)
+
+
 def verify_closure(meta_path: str, keep_temp: bool = False) -> bool:
     """
     闭合集合验证：
@@ -140,8 +201,9 @@ def verify_closure(meta_path: str, keep_temp: bool = False) -> bool:
                    True 时保留临时文件，便于调试。
     """
 
-    # 1) parse 原始
-    h1, g1 = parse_pegasus_metadata(meta_path)
+    # 1) parse 原始（mtime 没变就吃缓存；临时文件的 reparse 不缓存，
+    #    那一步本身就是要验证的东西）
+    h1, g1 = _parse_cached(meta_path, os.stat(meta_path).st_mtime_ns)
 
     # 2) 生成临时路径：同级目录 / _norm_test / metadata.txt.norm
     base_dir = os.path.dirname(meta_path)
@@ -157,33 +219,7 @@ def verify_closure(meta_path: str, keep_temp: bool = False) -> bool:
     # 3) 再 parse 回来
     h2, g2 = parse_pegasus_metadata(temp_path)
 
-    # ==== header 归一化后比较 ====
-    nh1 = _normalize_header(h1 or {})
-    nh2 = _normalize_header(h2 or {})
-    is_header_same = (nh1 == nh2)
-
-    # ==== games 归一化后比较 ====
-    g1_norm = [_normalize_game(g) for g in g1]
-    g2_norm = [_normalize_game(g) for g in g2]
-
-    g1_sorted = sorted(g1_norm, key=_game_key)
-    g2_sorted = sorted(g2_norm, key=_game_key)
-
-    is_games_same = (g1_sorted == g2_sorted)
-
-    if not is_games_same:
-        print("[DEBUG] 找第一条不相等的 game：")
-        for a, b in zip(g1_sorted, g2_sorted):
-            if a != b:
-                print("game1 =", json.dumps(a, ensure_ascii=False, indent=2))
-                print("game2 =", json.dumps(b, ensure_ascii=False, indent=2))
-                break
-
-    # 输出结果
-    print("---- 闭合性检查 ----")
-    print("header 相同：", is_header_same)
-    print("games  相同：", is_games_same)
-
+    is_header_same, is_games_same = _closure_compare(h1, g1, h2, g2)
     ok = is_header_same and is_games_same
 
     # 4) 自动删除临时文件（除非 keep_temp=True）
@@ -196,12 +232,4 @@ def verify_closure(meta_path: str, keep_temp: bool = False) -> bool:
         except Exception:
             pass
 
-    # 差异提示
-    if not ok:
-        print("\n[DIFF] 发现差异，可前往调试：")
-        print("header1 =", json.dumps(h1, indent=2, ensure_ascii=False))
-        print("header2 =", json.dumps(h2, indent=2, ensure_ascii=False))
-        print("games1_count =", len(g1))
-        print("games2_count =", len(g2))
-
-    return ok
+    return _report_closure(meta_path, h1, g1, h2, g2, is_header_same, is_games_same)
@@ -1,22 +1,24 @@
 # Tools/core_planner.py
 from __future__ import annotations
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
 
 # 1. 平台级默认 core 映射（兜底）
-PLATFORM_DEFAULT_CORES: Dict[str, str] = {
+# MappingProxyType：只读视图，谁都别在运行时偷偷改表
+PLATFORM_DEFAULT_CORES: Mapping[str, str] = MappingProxyType({
     "ss_hack": "mednafen_saturn_hw",
     "dc": "flycast",
     "psx": "pcsx_rearmed",
     # ...
-}
+})
 
 # 2. 扩展名 → core 的兜底映射（再兜底）
-EXT_CORE_MAP: Dict[str, str] = {
+EXT_CORE_MAP: Mapping[str, str] = MappingProxyType({
     ".chd": "mednafen_saturn_hw",   # Saturn/DC 你可以按平台 key 再细分
     ".cue": "mednafen_psx_hw",
     ".iso": "mednafen_saturn",
     ".bin": "mednafen_psx_hw",
-}
+})
 
 
 def choose_core_for_game(
@@ -37,13 +39,14 @@ def choose_core_for_game(
     if core:
         return core
 
-    platform_key_lower = (platform_key or "").lower()
-
     # 2) 平台级默认 core（来自 export_to_json / header launch 解析）
     core = payload.get("default_core")
     if core:
         return core
 
+    # 走到兜底分支才需要小写 key（override/default 命中时白算一次）
+    platform_key_lower = (platform_key or "").lower()
+
     # ------- 重点：PS2 目前统一走 Android AetherSX2 / NetherSX2 standalone -------
     # 暂时不自动分配 libretro core，防止 .chd 被误绑 Saturn/DC
     if platform_key_lower in ("ps2", "playstation2"):
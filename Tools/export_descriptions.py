@@ -4,8 +4,18 @@
 import json
 from pathlib import Path
 
+# orjson 可选：JSONL 每行一次 dumps，直接产出 bytes 免 encode
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 JSONDB_DIR = Path("jsondb")
 
+# 关键词提到模块级：每个 game 不再新建 list，
+# name/file 拼起来只 lower 一次、每个词只扫一遍
+_HACK_KEYWORDS = ("hack", "改版", "修正版")
+
 
 def detect_hack(platform_key, game):
     # 1) Platform 级别 hack → 100% hack
@@ -16,15 +26,9 @@ def detect_hack(platform_key, game):
     # 如果未来你想扩展，例如：
     # if "hack" in platform_display_name.lower(): return True
 
-    # 3)（可选）再用轻量级关键词辅助
-    name = (game.get("game") or "").lower()
-    file = (game.get("file") or "").lower()
-    keywords = ["hack", "改版", "修正版"]
-
-    if any(k in name or k in file for k in keywords):
-        return True
-
-    return False
+    # 3)（可选）再用轻量级关键词辅助（\x00 分隔，避免跨字段误拼）
+    combined = ((game.get("game") or "") + "\x00" + (game.get("file") or "")).lower()
+    return any(k in combined for k in _HACK_KEYWORDS)
 
 
 def export_descriptions(out_path: Path = Path("descriptions_raw.jsonl")):
@@ -41,10 +45,13 @@ def export_descriptions(out_path: Path = Path("descriptions_raw.jsonl")):
       "file": "downtown.zip"
     }
     """
-    with out_path.open("w", encoding="utf-8") as f_out:
+    with out_path.open("wb") as f_out:
         for json_path in sorted(JSONDB_DIR.glob("*.json")):
-            with json_path.open("r", encoding="utf-8") as f:
-                payload = json.load(f)
+            raw = json_path.read_bytes()
+            if orjson is not None:
+                payload = orjson.loads(raw)
+            else:
+                payload = json.loads(raw.decode("utf-8"))
 
             platform_key = json_path.stem
             platform_name = payload.get("platform", platform_key)
@@ -60,7 +67,10 @@ def export_descriptions(out_path: Path = Path("descriptions_raw.jsonl")):
                     "description": g.get("description", ""),
                     "is_hack": detect_hack(platform_key, g),
                 }
-                f_out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                if orjson is not None:
+                    f_out.write(orjson.dumps(rec) + b"\n")
+                else:
+                    f_out.write(json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n")
 
     print(f"[OK] 导出完成 -> {out_path}")
 
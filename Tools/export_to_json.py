@@ -9,15 +9,41 @@ from __future__ import annotations
 import hashlib
 import os
 import json
-from pathlib import Path, PurePosixPath
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from pegasus_alias_rewrite import rewrite_json_obj
+from pegasus_alias_rewrite import rewrite_game_overrides, rewrite_json_obj
+
+# orjson 可选：C 实现的 indent 序列化比 stdlib 的纯 Python
+# 格式化快好几倍，大平台 payload 很能感觉到；没装走 stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps_indent2(obj) -> str:
+    """和 json.dumps(..., ensure_ascii=False, indent=2) 等价的文本。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2)
 
 from .metadata_scanner import parse_pegasus_metadata, extract_libretro_core, normalize_launch_block
 from .rom_scanner import HEADER_BYTES, RomHasher
 
+@lru_cache(maxsize=None)
+def _parse_meta_cached(path: str, mtime_ns: int) -> Tuple[Dict, List[Dict]]:
+    """按 (path, mtime_ns) 缓存 parse 结果：批量导出/重复调用时
+    同一份 metadata 不重复解析（mtime 变了自然换 key）。"""
+    return parse_pegasus_metadata(path)
+
+
+# “参数没传”哨兵：None 是 launch_block 的合法取值，不能拿来当默认
+_UNSET = object()
+
 GAME_PASSTHROUGH_FIELDS = (
     "publisher",
     "release",
@@ -42,9 +68,11 @@ def _normalize_assets_media_dir(
     if not isinstance(assets, dict) or not file_name:
         return assets
 
-    normalized_file = file_name.replace("\\", "/")
-    file_path = PurePosixPath(normalized_file)
-    media_base = file_path.stem or file_path.name
+    # media_base 纯字符串算一次：PurePosixPath 的 parts/stem 代数
+    # 每个 asset 一套对象，N 个 game × ~3 个 asset 全是 GC 压力
+    base_name = file_name.replace("\\", "/").rsplit("/", 1)[-1]
+    dot = base_name.rfind(".")
+    media_base = base_name[:dot] if dot > 0 else base_name
 
     valid_roms = [
         rom.replace("\\", "/").strip()
@@ -52,46 +80,116 @@ def _normalize_assets_media_dir(
         if isinstance(rom, str) and rom.strip()
     ]
     if len(valid_roms) > 1:
-        first_path = PurePosixPath(valid_roms[0])
-        if len(first_path.parts) >= 2:
-            media_base = first_path.parts[0]
+        first, sep, _ = valid_roms[0].partition("/")
+        if sep and first:
+            media_base = first
 
     new_assets: Dict = {}
+    prefix = "media/" + media_base + "/"
     for k, v in assets.items():
-        if not isinstance(v, str):
+        # 只处理 media/ 开头的字符串路径
+        if not isinstance(v, str) or not v.startswith("media/"):
             new_assets[k] = v
             continue
 
-        p = PurePosixPath(v)
-        parts = list(p.parts)
-
-        # 只处理以 media 开头的路径：media/xxx/...
-        if len(parts) >= 2 and parts[0] == "media":
-            # 只有第二段是纯数字目录时才规范化：
-            # 单文件改到 ROM stem，多文件保留共同父目录。
-            if len(parts) >= 3 and parts[1].isdigit():
-                rest = parts[2:]  # 去掉原来的第二段（数字目录）
-                new_p = PurePosixPath("media") / media_base
-                for comp in rest:
-                    new_p /= comp
-                new_assets[k] = str(new_p)
-            else:
-                # ✅ 非数字目录（例如中文名/英文名）一律保持原样
-                new_assets[k] = v
+        # 只有第二段是纯数字目录时才规范化：
+        # 单文件改到 ROM stem，多文件保留共同父目录。
+        # 非数字目录（例如中文名/英文名）一律保持原样。
+        parts = v.split("/", 2)
+        if len(parts) == 3 and parts[1].isdigit():
+            new_assets[k] = prefix + parts[2]
         else:
             new_assets[k] = v
 
     return new_assets
 
 
+def _classify_ps2(launch_info: Dict) -> str:
+    """PS2 细分：Android am start 到 AetherSX2/NetherSX2 的算一类。"""
+    if launch_info.get("kind") == "android_am" and launch_info.get("emulator") in (
+        "aethersx2_android",
+        "nethersx2_android",
+    ):
+        return "ps2_android_aethersx2"
+    return "ps2"
+
+
+# platform_type 推断规则表：按小写 platform key 查，一次 dict 查找
+# 取代每次 export 重走一遍条件链（批量导出几十个平台时跑得勤）
+_PLATFORM_RULES = {
+    "ps2": _classify_ps2,
+    "playstation2": _classify_ps2,
+}
+
+
+def _index_rom_root(rom_root: str) -> set:
+    """一次递归 scandir 列出 rom_root 下所有文件的相对路径。
+
+    逐条 is_file() 是每个 ROM 一次 stat；readdir 批量拿目录项，
+    几千个 ROM 的平台一次遍历就够。
+    """
+    index: set[str] = set()
+    root = str(rom_root)
+    base_len = len(root.rstrip("/\\")) + 1
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    else:
+                        index.add(e.path[base_len:].replace(os.sep, "/"))
+        except OSError:
+            pass
+    return index
+
+
+def _rom_index_fingerprint(rom_root: str) -> str:
+    """rom_root 下所有文件 (相对路径, mtime_ns, size) 的 sha256。
+
+    只走 readdir + stat，不碰文件内容——够判断“ROM 集合有没有动过”。
+    """
+    entries: list = []
+    root = str(rom_root)
+    base_len = len(root.rstrip("/\\")) + 1
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    else:
+                        try:
+                            st = e.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        rel = e.path[base_len:].replace(os.sep, "/")
+                        entries.append(f"{rel}\0{st.st_mtime_ns}\0{st.st_size}\n")
+        except OSError:
+            pass
+    entries.sort()
+    return hashlib.sha256("".join(entries).encode("utf-8")).hexdigest()
+
+
 def _build_game_json(
     game: Dict,
     header: Dict,
     platform: str,
-    rom_root: Optional[str] = None,
+    rom_root_path: Optional[Path] = None,
     hasher: Optional[RomHasher] = None,
+    id_hasher=None,
+    rom_hash_cache: Optional[Dict] = None,
+    default_launch_block=_UNSET,
 ) -> Dict:
-    """把解析出的 game dict 转成最终 JSON schema."""
+    """把解析出的 game dict 转成最终 JSON schema.
+
+    `default_launch_block` 由批量调用方从 header 里取一次传进来，
+    免得每个 game 都查一遍同一个 key；不传就自己查（单独调用兼容）。
+    """
 
     title = game.get("game")
     file_name = game.get("file")
@@ -133,16 +231,24 @@ def _build_game_json(
     # =====================================================
     # 🔥 新增: 游戏唯一 ID（platform + file 的 sha256 截断）
     # =====================================================
-    sig_source = f"{platform}:{file_name}".encode("utf-8")
-    digest = hashlib.sha256(sig_source).hexdigest()
-    # 截为 16 字符，更优雅；你要 full hash 也可以另外输出
-    data["id"] = f"{platform}_{digest[:16]}"
+    # "platform:" 前缀的 hasher 在循环外建好一次，每个 game 只
+    # copy + update 文件名； digest()[:8].hex() 和 hexdigest()[:16]
+    # 同值，但不用格式化整条 64 字符再丢掉大半
+    if id_hasher is None:
+        id_hasher = hashlib.sha256(f"{platform}:".encode("utf-8"))
+    h = id_hasher.copy()
+    # parse 阶段已经编码好的 bytes 优先；没有（比如 file 缺失）再兜底
+    fb = game.get("_file_bytes")
+    h.update(fb if fb is not None else str(file_name).encode("utf-8"))
+    data["id"] = f"{platform}_{h.digest()[:8].hex()}"
 
     # =====================================================
     # 🔥 per-game launch override（保持你原有逻辑）
     # =====================================================
     game_launch = game.get("launch_block")
-    default_launch = header.get("launch_block")
+    if default_launch_block is _UNSET:
+        default_launch_block = header.get("launch_block")
+    default_launch = default_launch_block
     game_launch_str = (game_launch or "").strip()
 
     # 情况 A：游戏有 override → 写 launch_override + launch_info
@@ -159,9 +265,17 @@ def _build_game_json(
 
     rom_hashes = []
     for rom_path in game.get("roms", []):
-        full_path = Path(rom_root) / rom_path if rom_root else None
-        if full_path is not None and full_path.is_file() and hasher is not None:
-            size, sha256_full, md5_header = hasher.hash_rom(full_path)
+        # 预先并行算好的结果优先；直接调用时保留原来的串行路径
+        if rom_hash_cache is not None:
+            result = rom_hash_cache.get(rom_path)
+        elif rom_root_path is not None and hasher is not None:
+            full_path = rom_root_path / rom_path
+            result = hasher.hash_rom(full_path) if full_path.is_file() else None
+        else:
+            result = None
+
+        if result is not None:
+            size, sha256_full, md5_header = result
             rom_hashes.append({
                 "rom_rel": rom_path,
                 "exists": True,
@@ -185,26 +299,49 @@ def _build_game_json(
             
     return data
 
-def export_platform_to_json(
+def build_platform_data(
     key: str,
     platform_name: str,
     meta_path: str,
-    out_root: str = "jsondb",
     rom_root: str | None = None,
     rewrite_aliases: bool = True,
-) -> str:
-    """
-    读取 `meta_path`，生成 jsondb/{key}.json，返回输出文件路径。
+    executor: ThreadPoolExecutor | None = None,
+):
+    """parse + 规范化一次算好，返回 (payload_head, games 生成器)。
+
+    贵的部分（解析、ROM 哈希、alias 清洗、ID/assets 规范化）全在
+    这里；要序列化成什么 schema 由调用方决定。games 按条生成，
+    不一次性物化整个列表。
     """
-    header, games = parse_pegasus_metadata(meta_path)
+    header, games = _parse_meta_cached(meta_path, os.stat(meta_path).st_mtime_ns)
 
 
     hasher = RomHasher(header_bytes=HEADER_BYTES) if rom_root else None
-    if not os.path.exists(out_root):
-        os.makedirs(out_root, exist_ok=True)
-
-    out_path = os.path.join(out_root, f"{key}.json")
-
+    id_hasher = hashlib.sha256(f"{platform_name}:".encode("utf-8"))
+
+    # ROM 哈希是 IO 为主 + SHA 计算，线程池把 read 和计算在多个
+    # ROM 之间重叠起来；去重后每个相对路径只算一次
+    # Path() 的 flavour 解析/规范化不便宜，整个 export 只构造一次
+    rom_root_path = Path(rom_root) if rom_root else None
+
+    rom_hash_cache: Dict[str, tuple] | None = None
+    if hasher is not None:
+        unique_roms = {r for g in games for r in (g.get("roms") or []) if r}
+        rom_hash_cache = {}
+        if unique_roms:
+            rom_index = _index_rom_root(rom_root)
+
+            def _hash_one(rel: str):
+                if rel.replace("\\", "/") not in rom_index:
+                    return rel, None
+                return rel, hasher.hash_rom(rom_root_path / rel)
+
+            if executor is not None:
+                rom_hash_cache.update(executor.map(_hash_one, unique_roms))
+            else:
+                workers = min(8, len(unique_roms), os.cpu_count() or 4)
+                with ThreadPoolExecutor(max_workers=workers) as ex:
+                    rom_hash_cache.update(ex.map(_hash_one, unique_roms))
     # export_to_json.py 里：
     ignore_files = header.get("ignore_files")
     if ignore_files is None:
@@ -215,6 +352,7 @@ def export_platform_to_json(
         else:
             ignore_files = []
 
+    # 顶层字段先凑齐（games 改为流式写在最后，不整体常驻内存）
     payload = {
         "schema_version": 1,
         "platform": platform_name,
@@ -226,17 +364,6 @@ def export_platform_to_json(
         "ignore_files": ignore_files,
         "extensions": header.get("extensions", []),
         # 可以按需暴露更多 header 字段
-        "games": [
-            _build_game_json(
-                g,
-                header,
-                platform_name,
-                rom_root=rom_root,
-                hasher=hasher,
-            )
-            for g in games
-        ],
-        
     }
 
     default_launch = (
@@ -262,13 +389,13 @@ def export_platform_to_json(
     collection_lower = str(header.get("collection") or "").lower()
 
     # 推断一个简洁的 platform_type，后续 exporter 可以直接 switch
-    if plat_key_lower in ("ps2", "playstation2") or "ps2" in collection_lower:
-        kind = default_launch_info.get("kind")
-        emulator = default_launch_info.get("emulator")
-        if kind == "android_am" and emulator in ("aethersx2_android", "nethersx2_android"):
-            platform_type = "ps2_android_aethersx2"
-        else:
-            platform_type = "ps2"
+    rule = _PLATFORM_RULES.get(plat_key_lower)
+    if rule is None and "ps2" in collection_lower:
+        # collection 名里带 ps2 的也按 PS2 规则走（兼容 key 没写规范的情况）
+        rule = _classify_ps2
+
+    if rule is not None:
+        platform_type = rule(default_launch_info)
     else:
         # 其他平台先简单兜底
         platform_type = plat_key_lower or (collection_lower or "unknown")
@@ -277,13 +404,133 @@ def export_platform_to_json(
 
     # Pegasus -> JSONDB 默认即完成 RetroArch Android core alias 清洗，
     # 避免导入后还必须额外运行 pegasus_alias_rewrite.py 才得到规范数据。
+    # （payload 此时没有 games，每个 game 在流式写盘时单独清洗）
     if rewrite_aliases:
         rewrite_json_obj(payload)
 
-    # ------- 写盘 -------
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    default_launch_block = header.get("launch_block")
+
+    def _iter_games():
+        for g in games:
+            gj = _build_game_json(
+                g,
+                header,
+                platform_name,
+                rom_root_path=rom_root_path,
+                hasher=hasher,
+                id_hasher=id_hasher,
+                rom_hash_cache=rom_hash_cache,
+                default_launch_block=default_launch_block,
+            )
+            if rewrite_aliases:
+                rewrite_game_overrides(gj)
+            yield gj
+
+    return payload, _iter_games()
+
+
+def export_platform_to_json(
+    key: str,
+    platform_name: str,
+    meta_path: str,
+    out_root: str = "jsondb",
+    rom_root: str | None = None,
+    rewrite_aliases: bool = True,
+    executor: ThreadPoolExecutor | None = None,
+    force: bool = False,
+) -> str:
+    """
+    读取 `meta_path`，生成 jsondb/{key}.json，返回输出文件路径。
+
+    `executor` 可选：批量导出时传入共享线程池，避免每个平台
+    各自起一池线程（见 export_all_platforms）。
+
+    输入没变（metadata 的 mtime/size + ROM 目录指纹一致）且输出
+    还在时直接返回，既有 .stamp 侧车文件负责记录上次的指纹；
+    `force=True` 无视 stamp 强制重新导出（成功后照常更新 stamp）。
+    """
+    meta_st = os.stat(meta_path)
+    out_path = os.path.join(out_root, f"{key}.json")
+    stamp_path = os.path.join(out_root, f"{key}.stamp")
+
+    stamp = {
+        "meta_mtime_ns": meta_st.st_mtime_ns,
+        "meta_size": meta_st.st_size,
+        "rom_index_hash": _rom_index_fingerprint(rom_root) if rom_root else None,
+        "rewrite_aliases": rewrite_aliases,
+    }
+    if not force and os.path.isfile(out_path):
+        try:
+            with open(stamp_path, "r", encoding="utf-8") as f:
+                if json.load(f) == stamp:
+                    return out_path   # 输入输出都没动，跳过整次导出
+        except (OSError, ValueError):
+            pass
+
+    payload, game_iter = build_platform_data(
+        key,
+        platform_name,
+        meta_path,
+        rom_root=rom_root,
+        rewrite_aliases=rewrite_aliases,
+        executor=executor,
+    )
+
+    if not os.path.exists(out_root):
+        os.makedirs(out_root, exist_ok=True)
+
+    # ------- 写盘：顶层一次序列化，games 逐条序列化逐条落盘 -------
+    # 几千个 game 的平台不再同时持有全部 game dict + 整个 JSON 文本
+    # buffering=1MiB：逐条 fragment 的小 write 在用户态攒批，
+    # 多 MB 输出的 write 系统调用从几千次降到个位数
+    with open(out_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        head_txt = _dumps_indent2(payload)
+        f.write(head_txt[:-2] + ',\n  "games": [')
+
+        first = True
+        for gj in game_iter:
+            frag = _dumps_indent2(gj)
+            frag = "\n".join("    " + ln for ln in frag.splitlines())
+            f.write(("\n" if first else ",\n") + frag)
+            first = False
+
+        f.write("]\n}" if first else "\n  ]\n}")
+
+    # 成功写完才落 stamp，下次同输入可以整体跳过
+    try:
+        with open(stamp_path, "w", encoding="utf-8") as f:
+            json.dump(stamp, f)
+    except OSError:
+        pass
 
     return out_path
 
 
+def export_all_platforms(
+    platforms: Dict[str, Tuple[str, str]],
+    out_root: str = "jsondb",
+    rom_root: str | None = None,
+    force: bool = False,
+) -> List[str]:
+    """批量导出 discover_platforms 的全部结果。
+
+    共享一个线程池做 ROM 哈希（省掉每个平台建池/销池），parse
+    缓存也天然跨平台复用。`rom_root` 不传时沿用约定：每个平台的
+    ROM 根目录就是其 metadata 所在目录。
+    """
+    out_paths: List[str] = []
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as ex:
+        for key, (name, meta_path) in sorted(platforms.items()):
+            root = rom_root or str(Path(meta_path).parent)
+            out_paths.append(
+                export_platform_to_json(
+                    key, name, meta_path,
+                    out_root=out_root,
+                    rom_root=root,
+                    executor=ex,
+                    force=force,
+                )
+            )
+    return out_paths
+
+
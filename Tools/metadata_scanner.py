@@ -10,11 +10,43 @@
 
 from __future__ import annotations
 
+import mmap
 import re
+from functools import lru_cache
 from pathlib import PurePosixPath
 from typing import Dict, List, Tuple, Optional, Any
 import shlex
 import os
+import sys
+
+# libretro core 提取的预编译正则：跳过 re 模块每次调用的
+# 模式缓存查找，直接用编译好的 Pattern 对象
+_CORE_RE = re.compile(r"/cores/([^/\s]+_libretro_android\.so)")
+
+# ROM 占位符检测：四个子串一次 C 级扫描搞定。
+# "{file" 比 "{file}" 更宽松，能覆盖 {file.documenturi}、
+# tfcardid{ABCD-1234}:{file.path} 这种形式
+_PLACEHOLDER_RE = re.compile(r"%ROM%|%rom%|\{file|%file%")
+
+# 有效行预筛：一次 C 级 findall 把空行/纯注释行全部丢掉，
+# 这些行就根本不进 Python 循环（只用于整块读入的小文件路径）
+_GOOD_LINE_RE = re.compile(r"^(?![ \t]*(?:#|$)).+", re.M)
+
+# 未知单行 key 的 "key: value" 提取：一次 match 连取带去空白，
+# 取代 partition + 两次 strip
+_KV_RE = re.compile(r"([^:]*?)\s*:\s*(.*?)\s*$")
+
+# 已知顶层 key 的一次性 C 级匹配：一个 match() 同时完成
+# “是不是已知 key”和“取 value”两件事（注意长 token 放前面：
+# files/extensions 必须排在 file/extension 之前）
+_KEY_RE = re.compile(
+    r"(game|files|file|sort-by|launch|description|ignore-files|extensions|extension)"
+    r"\s*:\s*(.*)$"
+)
+
+# 取值高度重复的字段（几百个 game 共享同一个厂商名之类），
+# parse 时 sys.intern 共享同一份底层字符串，省内存也加速后续 == 比较
+_INTERN_KEYS = {"developer", "publisher", "collection", "genre", "core_override"}
 
 KNOWN_TOP_LEVEL_KEYS = {
     "collection",
@@ -41,7 +73,11 @@ KNOWN_TOP_LEVEL_KEYS = {
 
 def normalize_launch_block(launch_block: str) -> Dict[str, Any]:
     """
-    把一段 Pegasus launch 命令“正则化”，返回结构化信息：
+    把一段 Pegasus launch 命令“正则化”，返回结构化信息。
+
+    纯字符串 → 结构的映射，按 strip 后的文本做 lru_cache：
+    整平台 games 共享同一段 launch 时只解析一次。返回浅拷贝，
+    调用方（比如 alias 清洗）改字段不会污染缓存。
 
     {
       "raw": "... 原始 launch ...",
@@ -53,20 +89,28 @@ def normalize_launch_block(launch_block: str) -> Dict[str, Any]:
       "kind": "android_am"  # 可选：Android am start 之类的类型标记
     }
     """
+    return dict(_normalize_launch_cached((launch_block or "").strip()))
+
+
+@lru_cache(maxsize=256)
+def _normalize_launch_cached(text: str) -> Dict[str, Any]:
     result: Dict[str, Any] = {
-        "raw": (launch_block or "").strip(),
+        "raw": text,
     }
-    text = result["raw"]
     if not text:
         return result
 
-    # 用 shlex 粗略拆 token（对大部分 Windows/Unix 命令都够用）
-    try:
-        tokens = shlex.split(text, posix=False)
-    except ValueError:
-        # 命令里有奇怪的引号，至少保留原文
-        result["tokens"] = []
-        return result
+    # 拆 token：没有引号的命令（绝大多数 launch 都是）直接
+    # str.split，C 一把梭；带引号才进纯 Python 的 shlex 状态机
+    if '"' not in text and "'" not in text:
+        tokens = text.split()
+    else:
+        try:
+            tokens = shlex.split(text, posix=False)
+        except ValueError:
+            # 命令里有奇怪的引号，至少保留原文
+            result["tokens"] = []
+            return result
 
     result["tokens"] = tokens
 
@@ -105,21 +149,195 @@ def normalize_launch_block(launch_block: str) -> Dict[str, Any]:
         result["core"] = core
 
     # 4) 找 ROM 占位符所在位置（%ROM%、{file}、%file% 之类）
-    rom_index: Optional[int] = None
+    search = _PLACEHOLDER_RE.search
     for idx, t in enumerate(tokens):
-        # "{file" 比 "{file}" 更宽松，能覆盖 {file.documenturi}、
-        # tfcardid{ABCD-1234}:{file.path} 这种形式
-        if ("%ROM%" in t) or ("%rom%" in t) or ("{file" in t) or ("%file%" in t):
-            rom_index = idx
+        if search(t):
+            result["rom_arg_index"] = idx
             break
 
-    if rom_index is not None:
-        result["rom_arg_index"] = rom_index
-
     return result
 
 
 
+# 超过这个大小的 metadata 不再整块复制进 Python 堆，
+# 改为逐行从 mmap 页缓存取（MAME 级文件 RSS 能省一半）
+_MMAP_STREAM_THRESHOLD = 1 << 20
+
+
+def _iter_mmap_lines(mm: "mmap.mmap"):
+    """逐行遍历 mmap：mm.find 在 C 里扫 \n，只有当前行进堆。"""
+    try:
+        pos = 0
+        size = len(mm)
+        first = True
+        while pos < size:
+            nl = mm.find(b"\n", pos)
+            end = size if nl == -1 else nl
+            raw = mm[pos:end]
+            pos = end + 1
+            if raw.endswith(b"\r"):
+                raw = raw[:-1]
+            line = raw.decode("utf-8", "replace")
+            if first:
+                first = False
+                if line.startswith("\ufeff"):
+                    line = line[1:]
+            yield line
+    finally:
+        mm.close()
+
+
+@lru_cache(maxsize=128)
+def _split_csv_cached(s: str) -> tuple:
+    return tuple(p for p in (x.strip() for x in s.split(",")) if p)
+
+
+def _split_csv(s: str) -> List[str]:
+    """逗号分隔 → 去空白的 list（extension 行又短又常重复，带缓存）。
+
+    缓存存 tuple，出口转 list：调用方拿到的列表随便改，
+    不会污染缓存里的那份。
+    """
+    return list(_split_csv_cached(s))
+
+
+# "files:" 占位符误入 roms 的判定：预编译一次，收尾时逐条
+# strip().lower().startswith() 的两次临时字符串就省下了
+_BAD_ROM_RE = re.compile(r"\s*files:", re.IGNORECASE)
+
+
+def _clean_roms(roms: List) -> List[str]:
+    """过滤掉空串和 "files:" 之类的占位符（game 收尾时用）。"""
+    return [
+        r for r in roms
+        if isinstance(r, str) and r.strip() and _BAD_ROM_RE.match(r) is None
+    ]
+
+
+# key -> 下划线字段名的记忆化映射：Pegasus 的 key 集合又小又封闭，
+# 查表命中就不再每次 replace 分配新字符串
+_KEY_ALIAS: Dict[str, str] = {}
+
+
+def _norm_key(k: str) -> str:
+    v = _KEY_ALIAS.get(k)
+    return v if v is not None else _KEY_ALIAS.setdefault(k, k.replace("-", "_"))
+
+
+# ---- 多行属性收尾的 handler 表 ----
+# header / game 各一张表按 key 直查，取代每次收尾重走一遍
+# if key == ... 比较链；未知 key 走默认的下划线化写入。
+
+def _fin_launch(target: Dict, key: str, text: str, buf: List[str]) -> None:
+    # 去掉开头多余的 "launch:" 前缀（兼容 "launch: xxx" 和 "launch:" 两种写法）
+    if text.startswith("launch:"):
+        text = text[len("launch:"):].lstrip()
+    target["launch_block"] = text
+
+
+def _fin_header_sort_by(target: Dict, key: str, text: str, buf: List[str]) -> None:
+    target["default_sort_by"] = text
+
+
+def _fin_ignore_files(target: Dict, key: str, text: str, buf: List[str]) -> None:
+    # buf[0] 是 "ignore-files:"，要去掉
+    target["ignore_files"] = [ln.strip() for ln in buf[1:] if ln.strip()]
+
+
+def _fin_extensions(target: Dict, key: str, text: str, buf: List[str]) -> None:
+    # 多行写法：
+    # extension:
+    #   7z
+    #   zip
+    exts: List[str] = []
+    for ln in buf[1:]:
+        exts.extend(_split_csv_cached(ln))
+    target["extensions"] = exts
+
+
+def _fin_game_sort_by(target: Dict, key: str, text: str, buf: List[str]) -> None:
+    target["sort_by"] = text
+
+
+def _fin_description(target: Dict, key: str, text: str, buf: List[str]) -> None:
+    # 如果开头是 "description:" 就砍掉这一段
+    if text.startswith("description:"):
+        text = text[len("description:"):].lstrip()
+    target["description"] = text
+
+
+def _fin_files(target: Dict, key: str, text: str, buf: List[str]) -> None:
+    # 多行 files:
+    #   path1
+    #   path2
+    # 注意：防止 "files:"/空行 混进来
+    lines: List[str] = []
+    for ln in buf:
+        stripped = ln.strip()
+        if not stripped:
+            continue
+        # 万一哪天 buf 里真的混进 "files:"，这里直接跳过
+        if stripped.lower().startswith("files:"):
+            continue
+        lines.append(stripped)
+
+    target.setdefault("roms", []).extend(lines)
+
+
+def _fin_default(target: Dict, key: str, text: str, buf: List[str]) -> None:
+    target[_norm_key(key)] = text
+
+
+_HEADER_FINALIZERS = {
+    "launch": _fin_launch,
+    "sort-by": _fin_header_sort_by,
+    "ignore-files": _fin_ignore_files,
+    "extension": _fin_extensions,
+    "extensions": _fin_extensions,
+}
+
+_GAME_FINALIZERS = {
+    "launch": _fin_launch,
+    "sort-by": _fin_game_sort_by,
+    "description": _fin_description,
+    "files": _fin_files,
+}
+
+
+def _seal_game(g: Dict) -> Dict:
+    """game 收尾：统一 file/roms、滤占位符、补默认 assets。
+
+    game 边界和 EOF 两处共用；热点 key 只各查一次 dict。
+    """
+    get = g.get
+    roms = _clean_roms(get("roms", []))
+
+    # 如果之前误写了 file = "files:"，这里也顺手清理掉
+    fval = get("file")
+    if isinstance(fval, str) and _BAD_ROM_RE.match(fval):
+        g.pop("file", None)
+        fval = None
+
+    if not roms and isinstance(fval, str) and fval.strip():
+        # 兼容只有 file: 的写法
+        roms = [fval]
+
+    g["roms"] = roms
+
+    # 优先保证 file 和 roms[0] 对齐
+    if roms and not get("file"):
+        g["file"] = roms[0]
+
+    # 导出算 ID 要的 UTF-8 bytes 在这里一次编码好，
+    # 省得热循环里每个 game 再 encode 一遍
+    fv = get("file")
+    if isinstance(fv, str):
+        g["_file_bytes"] = fv.encode("utf-8")
+
+    _ensure_default_assets(g)
+    return g
+
+
 def _finalize_multiline_prop(
     target: Dict,
     key: Optional[str],
@@ -129,77 +347,22 @@ def _finalize_multiline_prop(
     """把正在累积的多行属性收尾写入 target."""
     if not key:
         return
-    text = "\n".join(buf).rstrip("\n")
-
-    if is_header:
-        if key == "launch":
-            # 去掉开头多余的 "launch:" 前缀（兼容 "launch: xxx" 和 "launch:" 两种写法）
-            txt = text
-            if txt.startswith("launch:"):
-                txt = txt[len("launch:"):].lstrip()
-            target["launch_block"] = txt
-        elif key == "sort-by":
-            target["default_sort_by"] = text
-        elif key == "ignore-files":
-            # buf[0] 是 "ignore-files:"，要去掉
-            items = [ln.strip() for ln in buf[1:] if ln.strip()]
-            target["ignore_files"] = items
-        elif key in ("extension", "extensions"):
-            # 多行写法：
-            # extension:
-            #   7z
-            #   zip
-            lines = buf[1:] if len(buf) > 1 else []
-            exts: List[str] = []
-            for ln in lines:
-                for part in ln.split(","):
-                    p = part.strip()
-                    if p:
-                        exts.append(p)
-            target["extensions"] = exts
-        else:
-            target[key.replace("-", "_")] = text
+    # 单行/空 buf 不值得 join 一趟
+    if not buf:
+        text = ""
+    elif len(buf) == 1:
+        text = buf[0]
     else:
-        # game block 内
-        if key == "launch":
-            txt = text
-            if txt.startswith("launch:"):
-                txt = txt[len("launch:"):].lstrip()
-            target["launch_block"] = txt
-        elif key == "sort-by":
-            target["sort_by"] = text
-        elif key == "description":
-            text = "\n".join(buf).rstrip("\n")
-            # 如果开头是 "description:" 就砍掉这一段
-            if text.startswith("description:"):
-                text = text[len("description:"):].lstrip()
-            target["description"] = text
-
-        elif key == "files":
-            # 多行 files:
-            #   path1
-            #   path2
-            # 注意：防止 "files:"/空行 混进来
-            lines: List[str] = []
-            for ln in buf:
-                s = ln.strip()
-                if not s:
-                    continue
-                # 万一哪天 buf 里真的混进 "files:"，这里直接跳过
-                if s.lower().startswith("files:"):
-                    continue
-                lines.append(s)
-
-            roms = target.setdefault("roms", [])
-            roms.extend(lines)
+        text = "\n".join(buf).rstrip("\n")
+    table = _HEADER_FINALIZERS if is_header else _GAME_FINALIZERS
+    table.get(key, _fin_default)(target, key, text, buf)
 
-        else:
-            target[key.replace("-", "_")] = text
 
+def _parse_pegasus_lines(lines) -> Tuple[Dict, List[Dict]]:
+    """对一个"有效行"迭代器跑完整解析循环，返回 (header, games)。
 
-def parse_pegasus_metadata(path: str) -> Tuple[Dict, List[Dict]]:
-    """
-    解析 Pegasus metadata 文件，返回 (header, games)。
+    文件路径版 parse_pegasus_metadata 和内存文本版 parse_pegasus_text
+    共用这套循环。
 
     header 大致结构：
         {
@@ -227,230 +390,231 @@ def parse_pegasus_metadata(path: str) -> Tuple[Dict, List[Dict]]:
     current_game: Optional[Dict] = None
     in_header = True
 
-    # 当前正在累积的多行属性
+    # 当前正在累积的多行属性（buf 整个 parse 复用一份，
+    # 段落之间 clear() 而不是反复建新 list）
     current_key: Optional[str] = None
     buf: List[str] = []
 
     def flush_multiline():
-        nonlocal current_key, buf
+        nonlocal current_key
         if in_header:
             _finalize_multiline_prop(header, current_key, buf, is_header=True)
         else:
             if current_game is not None:
                 _finalize_multiline_prop(current_game, current_key, buf, is_header=False)
         current_key = None
-        buf = []
+        buf.clear()
 
-    # utf-8-sig also accepts ordinary UTF-8 while removing an optional BOM.
-    with open(path, "r", encoding="utf-8-sig") as f:
-        for raw_line in f:
-            line = raw_line.rstrip("\n")
+    # ---- 顶层 key 的 dict 分发 ----
+    # 每行只 partition 一次，已知 key O(1) 查表进 handler，
+    # 取代原来一串 if key == ... 逐个试的分支链（MAME 级 metadata
+    # 有几万行，每行省下的分支是可观的）。
+
+    def _on_game(key: str, value: str) -> None:
+        nonlocal in_header, current_game, current_key
+        in_header = False
+        # 收尾上一 game
+        if current_game is not None:
+            games.append(_seal_game(current_game))
+
+        current_game = {"game": value}
+        current_key = None
+        buf.clear()
+
+    def _on_file(key: str, value: str) -> None:
+        # file: 特殊处理，多次出现 -> roms 列表；header 不应该出现 file
+        if in_header or current_game is None:
+            return
+        current_game.setdefault("roms", []).append(value)
+
+    def _on_files(key: str, value: str) -> None:
+        nonlocal current_key
+        # files: 是纯多行列表，不需要把首行带进去
+        current_key = key
+        buf.clear()
+
+    def _on_multiline(key: str, value: str) -> None:
+        # launch / description / ignore-files 这类多行字段的起始行
+        nonlocal current_key
+        current_key = key
+        buf.clear()
+        buf.append(f"{key}: {value}" if value else f"{key}:")
+
+    def _on_extension(key: str, value: str) -> None:
+        nonlocal current_key
+        # ---- 特殊处理 extension：支持单行写法 "extension: 7z, zip" ----
+        if in_header:
+            if value:
+                # 单行：直接解析 value → ["7z", "zip"]，不进入多行流程
+                header["extensions"] = _split_csv(value)
+                current_key = None
+                buf.clear()
+            else:
+                # 真·多行 extension:
+                current_key = key
+                buf.clear()
+                buf.append(f"{key}:")
+        else:
+            _on_multiline(key, value)
+
+    def _on_sort_by(key: str, value: str) -> None:
+        if in_header:
+            header["default_sort_by"] = sys.intern(value)
+        elif current_game is not None:
+            current_game["sort_by"] = sys.intern(value)
+
+    handlers = {
+        "game": _on_game,
+        "file": _on_file,
+        "files": _on_files,
+        "sort-by": _on_sort_by,
+        "launch": _on_multiline,
+        "description": _on_multiline,
+        "ignore-files": _on_multiline,
+        "extension": _on_extension,
+        "extensions": _on_extension,
+    }
+
+    for line in lines:
+        # 每行只做一次 lstrip，空行/注释/缩进判断全复用它，
+        # 不再 strip / lstrip / startswith 各扫一遍
+        stripped = line.lstrip()
+        if not stripped or stripped[0] == "#":
+            continue
+
+        # 兼容未缩进的多行 description。只有已知 Pegasus 字段才结束
+        # description；诸如 "1. Arcade: ..." 的正文继续作为描述内容。
+        if current_key == "description" and line[0] not in " \t":
+            candidate = line.partition(":")[0].strip() if ":" in line else ""
+            is_property = (
+                candidate in KNOWN_TOP_LEVEL_KEYS
+                or candidate.startswith("assets.")
+            )
+            if not is_property:
+                buf.append(line)
+                continue
+
+        # 顶层 key（不缩进；line 非空，下标比 startswith 便宜）
+        if line[0] != " ":
+            # 先收尾上一段多行属性
+            flush_multiline()
 
-            # 跳过空行 / 纯注释行
-            if not line.strip() or line.lstrip().startswith("#"):
+            # 已知 key 一次正则匹配直接进 handler
+            m = _KEY_RE.match(line)
+            if m is not None:
+                handlers[m.group(1)](m.group(1), m.group(2).rstrip())
                 continue
 
-            # 兼容未缩进的多行 description。只有已知 Pegasus 字段才结束
-            # description；诸如 "1. Arcade: ..." 的正文继续作为描述内容。
-            if current_key == "description" and not line.startswith((" ", "\t")):
-                candidate = line.partition(":")[0].strip() if ":" in line else ""
-                is_property = (
-                    candidate in KNOWN_TOP_LEVEL_KEYS
-                    or candidate.startswith("assets.")
-                )
-                if not is_property:
-                    buf.append(line)
-                    continue
-
-            # 顶层 key（不缩进）
-            if not line.startswith(" "):
-                # 先收尾上一段多行属性
-                flush_multiline()
-
-                # 解析 "key: value"
-                if ":" not in line:
-                    continue
-
-                key, _, value = line.partition(":")
-                key = key.strip()
-                value = value.strip()
-
-                # game: 开启新游戏块
-                if key == "game":
-                    in_header = False
-                    # 收尾上一 game
-                    if current_game is not None:
-                        # 统一 file / roms
-                        roms = current_game.get("roms", [])
-
-                        # 先把意外的 "files:" 之类的占位符滤掉
-                        roms = [
-                            r for r in roms
-                            if isinstance(r, str)
-                            and r.strip()
-                            and not r.strip().lower().startswith("files:")
-                        ]
-
-                        # 如果之前误写了 file = "files:"，这里也顺手清理掉
-                        fval = current_game.get("file")
-                        if isinstance(fval, str) and fval.strip().lower().startswith("files:"):
-                            current_game.pop("file", None)
-
-                        if not roms:
-                            # 兼容只有 file: 的写法
-                            fpath = current_game.get("file")
-                            if isinstance(fpath, str) and fpath.strip():
-                                roms = [fpath]
-
-                        current_game["roms"] = roms
-
-                        # 优先保证 file 和 roms[0] 对齐
-                        if roms:
-                            if "file" not in current_game or not current_game["file"]:
-                                current_game["file"] = roms[0]
-
-                        _ensure_default_assets(current_game)
-                        games.append(current_game)
-
-
-
-                    current_game = {"game": value}
-                    current_key = None
-                    buf = []
-                    continue
-
-                # 其他 header/game 属性
-                # file: 特殊处理，多次出现 -> roms 列表
-                if key == "file":
-                    if in_header:
-                        # header 不应该出现 file
-                        continue
-                    if current_game is None:
-                        continue
-                    roms = current_game.setdefault("roms", [])
-                    roms.append(value)
-                    # 不把 "file" 作为多行字段继续累积
-                    continue
-
-                # assets 处理
-                if key.startswith("assets."):
-                    if in_header or current_game is None:
-                        continue
+            # 其余（assets.* / 自定义单行 key）一次正则连取带修剪
+            m = _KV_RE.match(line)
+            if m is None:
+                continue
+
+            key = m.group(1)
+            value = m.group(2)
+
+            if key.startswith("assets."):
+                if not in_header and current_game is not None:
                     sub = key.split(".", 1)[1].strip()
                     if sub:
                         assets = current_game.setdefault("assets", {})
                         assets[sub] = value
-                    continue
-
-                # 启动多行属性（launch, description, ignore-files, extension 等）
-                if key in ("launch", "description", "ignore-files", "extension", "extensions", "files"):
-                    current_key = key
-                    if key == "files":
-                        # files: 是纯多行列表，不需要把首行带进去
-                        buf = []
-                        continue
-
-
-                    # ---- 特殊处理 extension：支持单行写法 "extension: 7z, zip" ----
-                    if key in ("extension", "extensions") and in_header:
-                        if value:
-                            # 单行：直接解析 value → ["7z", "zip"]
-                            exts = []
-                            for part in value.split(","):
-                                p = part.strip()
-                                if p:
-                                    exts.append(p)
-                            header["extensions"] = exts
-                            # ★ 关键：既然是单行解析完成，就不要再进入多行流程了
-                            current_key = None
-                            buf = []
-                            continue
-                        else:
-                            # 真·多行 extension:
-                            # extension:
-                            #   7z
-                            #   zip
-                            current_key = key
-                            buf = [f"{key}:"]
-                    else:
-                        # 其他多行字段（launch / description / ignore-files）
-                        current_key = key
-                        if value:
-                            buf = [f"{key}: {value}"]
-                        else:
-                            buf = [f"{key}:"]
-
-                else:
-                    # 单行属性，直接写入
-                    target = header if in_header else current_game
-                    if target is None:
-                        continue
-                    if key == "sort-by":
-                        if in_header:
-                            header["default_sort_by"] = value
-                        else:
-                            current_game["sort_by"] = value
-                    else:
-                        target[key.replace("-", "_")] = value
+            else:
+                # 单行属性，直接写入
+                target = header if in_header else current_game
+                if target is not None:
+                    nk = _norm_key(key)
+                    target[nk] = sys.intern(value) if nk in _INTERN_KEYS else value
 
+        else:
+            # 缩进行：多行属性的 continuation
+            if current_key is not None:
+                # 缩进属于 Pegasus 多行语法，不属于字段内容。
+                buf.append(stripped)
             else:
-                # 缩进行：多行属性的 continuation
-                if current_key is not None:
-                    # 缩进属于 Pegasus 多行语法，不属于字段内容。
-                    buf.append(line.lstrip())
-                else:
-                    # 没有 current_key，当作 description 的一部分可能比较合理
-                    # 但为了简单我们这里直接丢弃，或者你可以根据需要补逻辑
-                    pass
+                # 没有 current_key，当作 description 的一部分可能比较合理
+                # 但为了简单我们这里直接丢弃，或者你可以根据需要补逻辑
+                pass
 
     # 文件结束后收尾
     flush_multiline()
     if current_game is not None:
-        roms = current_game.get("roms", [])
+        games.append(_seal_game(current_game))
 
-        roms = [
-            r for r in roms
-            if isinstance(r, str)
-            and r.strip()
-            and not r.strip().lower().startswith("files:")
-        ]
 
-        fval = current_game.get("file")
-        if isinstance(fval, str) and fval.strip().lower().startswith("files:"):
-            current_game.pop("file", None)
+    # header 里保证 default_sort_by 存在（哪怕 None）
+    if "default_sort_by" not in header:
+        header["default_sort_by"] = None
 
-        if not roms:
-            fpath = current_game.get("file")
-            if isinstance(fpath, str) and fpath.strip():
-                roms = [fpath]
+    return header, games
 
-        current_game["roms"] = roms
 
-        if roms:
-            if "file" not in current_game or not current_game["file"]:
-                current_game["file"] = roms[0]
+def parse_pegasus_metadata(path: str) -> Tuple[Dict, List[Dict]]:
+    """
+    解析 Pegasus metadata 文件，返回 (header, games)。
 
-        _ensure_default_assets(current_game)
-        games.append(current_game)
+    header 大致结构：
+        {
+          "collection": "...",
+          "default_sort_by": "004",
+          "launch_block": "launch:\\n  ...",
+          "ignore_files": [...],
+          "extensions": [...]
+        }
 
+    games 元素结构：
+        {
+          "game": "标题",
+          "roms": ["xx.chd", ...],
+          "file": "xx.chd",    # roms[0] 方便前端用
+          "sort_by": "001",
+          "developer": "...",
+          "description": "...",
+          "launch_block": "launch:\\n  ...",   # 仅 per-game override 时存在
+        }
+    """
+    # utf-8-sig also accepts ordinary UTF-8 while removing an optional BOM.
+    # mmap 一次拿整块 + 整体 decode + splitlines：跳过 TextIOWrapper
+    # 逐行增量 decode 和 universal-newlines 状态机，大文件省得很明显。
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            lines = iter(())  # 空文件 mmap 不了
+        else:
+            if len(mm) > _MMAP_STREAM_THRESHOLD:
+                # 大文件：逐行零拷贝（见 _iter_mmap_lines）
+                lines = _iter_mmap_lines(mm)
+            else:
+                with mm:
+                    data = mm.read()
+                text = data.decode("utf-8-sig")
+                if "\r" in text:
+                    text = text.replace("\r\n", "\n").replace("\r", "\n")
+                lines = iter(_GOOD_LINE_RE.findall(text))
 
-    # header 里保证 default_sort_by 存在（哪怕 None）
-    if "default_sort_by" not in header:
-        header["default_sort_by"] = None
+        return _parse_pegasus_lines(lines)
 
-    return header, games
+
+def parse_pegasus_text(text: str) -> Tuple[Dict, List[Dict]]:
+    """解析内存中的 metadata 文本（闭合性验证的 in-memory 路径用）。"""
+    if text.startswith("\ufeff"):
+        text = text[1:]
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return _parse_pegasus_lines(iter(_GOOD_LINE_RE.findall(text)))
 
 
+@lru_cache(maxsize=256)
 def extract_libretro_core(launch_block: str) -> Optional[str]:
     """
     从 launch block 里解析出 cores/xxx_libretro_android.so 这段，方便前端 override 用。
+    （纯函数，按文本缓存：默认 launch 会被每个 game 问一遍）
     """
     if not launch_block:
         return None
-    m = re.search(r"/cores/([^/\s]+_libretro_android\.so)", launch_block)
-    if not m:
-        return None
-    return m.group(1)
+    m = _CORE_RE.search(launch_block)
+    return m.group(1) if m else None
 
 
 def _infer_default_media_base(game_dict: Dict) -> Optional[str]:
@@ -489,16 +653,18 @@ def _ensure_default_assets(game_dict: Dict) -> None:
         多文件：media/{first_rom_parent}/boxfront.png / logo.png / video.mp4
     自动补上。
     """
-    # 已经有 assets，就不动
-    if "assets" in game_dict and game_dict["assets"]:
+    # 已经有 assets，就不动（一次 get 同时覆盖“缺 key”和“空值”）
+    if game_dict.get("assets"):
         return
 
     media_base = _infer_default_media_base(game_dict)
     if not media_base:
         return
 
+    # 共享前缀只拼一次，三个条目纯拼接
+    base = f"media/{media_base}/"
     game_dict["assets"] = {
-        "box_front": f"media/{media_base}/boxfront.png",
-        "logo":      f"media/{media_base}/logo.png",
-        "video":     f"media/{media_base}/video.mp4",
+        "box_front": base + "boxfront.png",
+        "logo":      base + "logo.png",
+        "video":     base + "video.mp4",
     }
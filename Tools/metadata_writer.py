@@ -1,6 +1,8 @@
 # Tools/metadata_writer.py
 
 from __future__ import annotations
+import io
+import os
 from typing import Dict, List, Any, TextIO
 from pathlib import PurePosixPath
 
@@ -24,13 +26,8 @@ DEFAULT_ASSET_NAMES = {
     },
 }
 
-def _infer_rom_stem_base_from_game(game: dict) -> str | None:
-    """
-    默认 media 目录按 ROM basename/stem 推断：
-      mslug.zip          -> media/mslug/...
-      mslugqy.zip        -> media/mslugqy/...
-      mslugd/mslug.zip   -> media/mslug/...
-    """
+def _first_rom(game: dict) -> str | None:
+    """取 game 的第一个 rom 相对路径（roms[0] 或兼容旧 schema 的 file）。"""
     roms = game.get("roms")
     if isinstance(roms, list) and roms:
         first = roms[0]
@@ -39,8 +36,29 @@ def _infer_rom_stem_base_from_game(game: dict) -> str | None:
 
     if not isinstance(first, str) or not first.strip():
         return None
+    return first.strip()
+
+
+def _rom_bases(first: str | None) -> tuple[str | None, str | None]:
+    """
+    从第一个 rom 一次算出 (rom_parent, rom_stem)：
+      mslug.zip          -> (None, "mslug")
+      mslugd/mslug.zip   -> ("mslugd", "mslug")
+    之前 parent / stem 各自构造一次 PurePosixPath，每个 asset 行都重算。
+    """
+    if not first:
+        return None, None
+
+    if "/" in first:
+        parent, _, base = first.partition("/")
+        base = base.rsplit("/", 1)[-1]
+    else:
+        parent = None
+        base = first
 
-    return PurePosixPath(first.strip()).stem
+    dot = base.rfind(".")
+    stem = base[:dot] if dot > 0 else base
+    return parent or None, stem or None
 
 
 def _infer_noise_title_bases_from_game(game: dict) -> set[str]:
@@ -72,30 +90,13 @@ def _is_standard_asset_filename(key: str, filename: str | None) -> bool:
         return False
     return filename in DEFAULT_ASSET_NAMES.get(key, set())
 
-def _infer_rom_parent_base_from_game(game: dict) -> str | None:
-    """
-    file: mslugd/mslug.zip -> mslugd
-    file: 恐龙新世纪 无限保险版/dino.zip -> 恐龙新世纪 无限保险版
-    file: mslugqy.zip -> None
-    """
-    roms = game.get("roms")
-    if isinstance(roms, list) and roms:
-        first = roms[0]
-    else:
-        first = game.get("file")
-
-    if not isinstance(first, str) or not first.strip():
-        return None
-
-    p = PurePosixPath(first.strip())
-    parts = p.parts
-
-    if len(parts) >= 2:
-        return parts[0]
-
-    return None
-
-def _should_emit_asset_line(key: str, value: str, game: dict) -> bool:
+def _should_emit_asset_line(
+    key: str,
+    value: str,
+    rom_parent: str | None,
+    rom_stem: str | None,
+    noise_bases: set[str],
+) -> bool:
     media_dir, filename = _asset_media_dir_and_filename(value)
 
     if not media_dir or not filename:
@@ -106,9 +107,6 @@ def _should_emit_asset_line(key: str, value: str, game: dict) -> bool:
         # 非标准文件名，可能是手工指定，保守写出
         return True
 
-    rom_parent = _infer_rom_parent_base_from_game(game)
-    rom_stem = _infer_rom_stem_base_from_game(game)
-
     # 关键修正：
     # 嵌套 ROM 的资源推断不稳定，只要 JSON 里显式给了 assets，就写回。
     # 覆盖：
@@ -123,7 +121,7 @@ def _should_emit_asset_line(key: str, value: str, game: dict) -> bool:
         return False
 
     # 单层 ROM：旧错误生成的 media/<中文游戏名>/ 三件套，不写
-    if media_dir in _infer_noise_title_bases_from_game(game):
+    if media_dir in noise_bases:
         return False
 
     # 其他 media 目录都是显式 override，要写
@@ -150,16 +148,13 @@ def _write_header(f: TextIO, header: Dict[str, Any]) -> None:
         if len(lines) == 1:
             f.write(f'launch: {lines[0]}\n')
         else:
-            f.write('launch:\n')
-            for line in lines:
-                f.write(f'  {line}\n')
+            # 缩进块一次 join 一次 write，不逐行进 StringIO
+            f.write('launch:\n  ' + '\n  '.join(lines) + '\n')
 
     # ignore_files 多行输出
     ignore_files = header.get("ignore_files") or []
     if ignore_files:
-        f.write('ignore-files:\n')
-        for pat in ignore_files:
-            f.write(f'  {pat}\n')
+        f.write('ignore-files:\n  ' + '\n  '.join(ignore_files) + '\n')
 
     # extensions 支持多行
     exts = header.get("extensions") or []
@@ -173,9 +168,7 @@ def _write_header(f: TextIO, header: Dict[str, Any]) -> None:
         exts = tmp
 
     if exts:
-        f.write("extension:\n")
-        for ext in exts:
-            f.write(f"  {ext}\n")
+        f.write("extension:\n  " + "\n  ".join(exts) + "\n")
 
 
         f.write("\n")  # 头部和 games 之间空一行
@@ -200,11 +193,17 @@ def _infer_media_base_from_multifiles(game: dict) -> str | None:
     if not isinstance(first, str) or not first.strip():
         return None
 
-    parts = PurePosixPath(first.strip()).parts
-    if len(parts) >= 2:
-        return parts[0]  # <- "009" / "012"
+    # rom 相对路径都是 posix 风格，直接 partition 取首段，
+    # 不用每条都构造 PurePosixPath 再拆 parts 元组
+    head, sep, rest = first.strip().partition("/")
+    if sep and head and rest:
+        return head  # <- "009" / "012"
     return None
 
+# assets 输出顺序固定，常量提到模块级，别在每个 game 里重建 list
+_ASSET_EMIT_KEYS = ("box_front", "logo", "video")
+
+
 def _collect_assets(game: dict) -> dict:
     assets = {}
     a = game.get("assets")
@@ -214,11 +213,14 @@ def _collect_assets(game: dict) -> dict:
                 assets[k] = v.strip()
 
     # legacy flat keys: assets.xxx
-    for k, v in game.items():
-        if isinstance(k, str) and k.startswith("assets.") and isinstance(v, str) and v.strip():
-            sub = k.split(".", 1)[1].strip()
-            if sub and sub not in assets:
-                assets[sub] = v.strip()
+    # 先用 any() 扫一遍 key 判断有没有（绝大多数 game 没有，
+    # 只做 startswith 就能跳过整个取值/strip 循环）
+    if any(isinstance(k, str) and k.startswith("assets.") for k in game):
+        for k, v in game.items():
+            if isinstance(k, str) and k.startswith("assets.") and isinstance(v, str) and v.strip():
+                sub = k.split(".", 1)[1].strip()
+                if sub and sub not in assets:
+                    assets[sub] = v.strip()
 
     return assets
 
@@ -227,10 +229,9 @@ def _rewrite_media_path_keep_filename(v: str, media_base: str) -> str:
     media/ANYTHING/filename -> media/<media_base>/filename
     If not starting with media/, keep unchanged.
     """
-    p = PurePosixPath(v)
-    parts = p.parts
-    if len(parts) >= 2 and parts[0] == "media":
-        return str(PurePosixPath("media") / media_base / parts[-1])
+    if v.startswith("media/") and len(v) > 6:
+        filename = v.rsplit("/", 1)[-1]
+        return f"media/{media_base}/{filename}"
     return v
 
 
@@ -253,7 +254,7 @@ def _emit_assets_lines(f, game: dict):
                 if isinstance(v, str) and v.strip():
                     assets[k] = _rewrite_media_path_keep_filename(v, media_base)
 
-        for key in ["box_front", "logo", "video"]:
+        for key in _ASSET_EMIT_KEYS:
             v = assets.get(key)
             if isinstance(v, str) and v.strip():
                 f.write(f"assets.{key}: {v.strip()}\n")
@@ -263,14 +264,18 @@ def _emit_assets_lines(f, game: dict):
     if not assets:
         return
 
-    for key in ["box_front", "logo", "video"]:
+    # game 级推断每个 game 只算一遍，不再每条 asset 行重扫 roms/标题
+    rom_parent, rom_stem = _rom_bases(_first_rom(game))
+    noise_bases = _infer_noise_title_bases_from_game(game)
+
+    for key in _ASSET_EMIT_KEYS:
         v = assets.get(key)
         if not (isinstance(v, str) and v.strip()):
             continue
 
         v = v.strip()
 
-        if not _should_emit_asset_line(key, v, game):
+        if not _should_emit_asset_line(key, v, rom_parent, rom_stem, noise_bases):
             continue
 
         f.write(f"assets.{key}: {v}\n")
@@ -302,9 +307,7 @@ def _emit_launch_block(f: TextIO, game: Dict[str, Any]) -> None:
     if len(lines) == 1:
         f.write(f"launch: {lines[0].rstrip()}\n")
     else:
-        f.write("launch:\n")
-        for line in lines:
-            f.write(f"  {line.rstrip()}\n")
+        f.write("launch:\n  " + "\n  ".join(line.rstrip() for line in lines) + "\n")
 
 
 
@@ -324,9 +327,7 @@ def _write_game(f: TextIO, game: Dict[str, Any]) -> None:
             f.write(f'file: {roms[0]}\n')
         else:
             # 规范写法：files: 多行
-            f.write('files:\n')
-            for path in roms:
-                f.write(f'  {path}\n')
+            f.write('files:\n  ' + '\n  '.join(roms) + '\n')
 
     sort_by = game.get("sort_by")
     if sort_by:
@@ -358,21 +359,37 @@ def _write_game(f: TextIO, game: Dict[str, Any]) -> None:
         if len(lines) == 1:
             f.write(f'description: {lines[0]}\n')
         else:
-            f.write('description:\n')
-            for line in lines:
-                f.write(f'  {line}\n')
+            f.write('description:\n  ' + '\n  '.join(lines) + '\n')
 
     _emit_launch_block(f, game)
 
     f.write("\n")  # game block 之间空一行
 
 
+def dumps_pegasus_metadata(header: Dict[str, Any], games: List[Dict[str, Any]]) -> str:
+    """渲染成 metadata 文本返回，不落盘（in-memory 闭合性验证用）。"""
+    # 先在 StringIO 里拼完，整体 encode 一次，os.write 直接落盘：
+    # 每个 game 几十个小 write 不再逐个过 编码器+缓冲 检查，
+    # 绕开文本 IO 的锁/分块 flush，系统调用也收敛成一次
+    buf = io.StringIO()
+    _write_header(buf, header or {})
+    for game in games:
+        _write_game(buf, game)
+    return buf.getvalue()
+
+
 def dump_pegasus_metadata(path: str, header: Dict[str, Any], games: List[Dict[str, Any]]) -> None:
     """
     把 parse_pegasus_metadata 的 (header, games) 写回 Pegasus metadata 格式。
     这是一个“规范化的写法”：排版、缩进、字段顺序都由这里统一决定。
     """
-    with open(path, "w", encoding="utf-8") as f:
-        _write_header(f, header or {})
-        for game in games:
-            _write_game(f, game)
+    payload = dumps_pegasus_metadata(header, games).encode("utf-8")
+    # O_BINARY 只有 Windows 有：保住 LF，不被换成 CRLF
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
@@ -20,12 +20,37 @@ ROM 扫描与哈希工具
 import argparse
 import hashlib
 import json
+import mmap
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 
+# orjson 可选：读大 jsondb / 缓存时反序列化走 C
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
 
 HEADER_BYTES = 65536
 
+# 3.11+ 的 file_digest：整个 读+update 循环在 C/OpenSSL 里跑，
+# x86_64 上直接走 SHA-NI 硬件指令；老版本回退到分块循环
+_file_digest = getattr(hashlib, "file_digest", None)
+
+# 超过这个大小改走 mmap：整个文件映射进来后 sha256 一次 C 调用吃完，
+# 连 file_digest 的分块 readinto 循环都省掉
+_MMAP_HASH_THRESHOLD = 32 * 1024 * 1024
+
+
 class RomHasher:
     """
     统一的 ROM Hash 工具：
@@ -42,39 +67,131 @@ class RomHasher:
         """
         返回: (size, sha256_full, md5_header)
         """
-        sha = self.sha_factory()
-        md5 = self.md5_factory()
+        try:
+            size_hint = path.stat().st_size
+        except OSError:
+            size_hint = 0
 
-        size = 0
-        remaining = self.header_bytes
+        if size_hint > _MMAP_HASH_THRESHOLD:
+            return self._hash_rom_mmap(path, size_hint)
 
         with path.open("rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                if not chunk:
-                    break
-
-                size += len(chunk)
-                sha.update(chunk)
-
-                # 前 header_bytes bytes 给 md5_header 用
-                if remaining > 0:
-                    if len(chunk) <= remaining:
-                        md5.update(chunk)
-                        remaining -= len(chunk)
-                    else:
-                        md5.update(chunk[:remaining])
-                        remaining = 0
-
-        sha256_full = sha.hexdigest()
-        md5_header = md5.hexdigest() if self.header_bytes > 0 else None
+            # 顺序读提示：让内核放开预读窗口
+            if hasattr(os, "posix_fadvise"):
+                try:
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                except OSError:
+                    pass
+            # md5_header：一次 read 拿前 header_bytes，算完 seek 回开头
+            if self.header_bytes > 0:
+                md5_header = self.md5_factory(f.read(self.header_bytes)).hexdigest()
+                f.seek(0)
+            else:
+                md5_header = None
+
+            if _file_digest is not None:
+                sha256_full = _file_digest(f, "sha256").hexdigest()
+                size = f.tell()   # file_digest 读到 EOF，tell 即文件大小
+            else:
+                # 旧解释器回退路径：1 MiB 块，几 GB 的 ISO/CHD
+                # 比 64 KiB 少两个数量级的 read 调用
+                sha = self.sha_factory()
+                size = 0
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    size += len(chunk)
+                    sha.update(chunk)
+                sha256_full = sha.hexdigest()
+
+            # 哈希完的页不会再用了，主动让内核回收，
+            # 批量扫描时不挤掉别人的 page cache
+            if hasattr(os, "posix_fadvise"):
+                try:
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+                except OSError:
+                    pass
+
+        return size, sha256_full, md5_header
+
+    def hash_stream(self, f) -> Tuple[int, str, Optional[str]]:
+        """对不可 seek 的流（比如 zip 成员）单遍算 size / sha256 / md5_header。"""
+        sha = self.sha_factory()
+        md5 = self.md5_factory() if self.header_bytes > 0 else None
+        header_left = self.header_bytes
+        size = 0
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            size += len(chunk)
+            sha.update(chunk)
+            if header_left > 0:
+                md5.update(chunk if len(chunk) <= header_left else chunk[:header_left])
+                header_left -= min(header_left, len(chunk))
+        md5_header = md5.hexdigest() if md5 is not None else None
+        return size, sha.hexdigest(), md5_header
+
+    def hash_target(self, path: Path) -> Tuple[int, str, Optional[str]]:
+        """
+        按文件类型分发：
+          - .zip：哈希包内最大的非 .cue 成员（压缩包自身的 hash 对不上
+            NoIntro/RA 数据库里存的裸 ROM hash）
+          - 其他：按普通文件整个哈希
+        """
+        if path.suffix.lower() == ".zip":
+            try:
+                with zipfile.ZipFile(path) as zf:
+                    members = [
+                        i for i in zf.infolist()
+                        if not i.is_dir() and not i.filename.lower().endswith(".cue")
+                    ]
+                    if members:
+                        best = max(members, key=lambda i: i.file_size)
+                        with zf.open(best) as f:
+                            return self.hash_stream(f)
+            except (zipfile.BadZipFile, OSError):
+                pass   # 坏包 / 读取失败就退回整包哈希
+        return self.hash_rom(path)
+
+    def _hash_rom_mmap(self, path: Path, size: int) -> Tuple[int, str, Optional[str]]:
+        """大文件路径：映射整个文件，sha256 / md5 都是对映射的单次 C 调用。"""
+        with path.open("rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # 顺序读提示：让内核按顺序预读、用过的页尽快回收
+                if hasattr(mm, "madvise"):
+                    try:
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                        mm.madvise(mmap.MADV_WILLNEED)
+                    except (OSError, ValueError):
+                        pass
+                if self.header_bytes > 0:
+                    md5_header = self.md5_factory(mm[: self.header_bytes]).hexdigest()
+                else:
+                    md5_header = None
+                sha256_full = self.sha_factory(mm).hexdigest()
         return size, sha256_full, md5_header
 
 
 
+def _load_hash_cache(cache_path: Path) -> Dict[str, Any]:
+    """读取持久化哈希缓存；文件不存在 / 损坏时当作空缓存。"""
+    try:
+        data = _loads(cache_path.read_bytes())
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_hash_cache(cache_path: Path, cache: Dict[str, Any]) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with cache_path.open("w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass   # 缓存写不进去不影响本次扫描结果
+
+
 def scan_roms_for_platform(
     platform: str,
     json_path: Path,
     rom_root: Path,
+    cache_path: Optional[Path] = None,
 ) -> Dict[str, Any]:
     """
     从指定 jsondb 平台文件扫描实际 ROM 文件，返回一个结构化 romhash 结果。
@@ -83,9 +200,12 @@ def scan_roms_for_platform(
     - json["games"][i]["roms"] 里的每一条，都是相对 rom_root 的路径
       （可以包含子目录，比如 "机动战士高达/.../Disc 1.chd"）
     - 如果 json 里没有 "roms"，fallback 用 "file"
+
+    cache_path 给定时启用持久化哈希缓存：按 rom_rel 存 (size, mtime_ns,
+    sha256_full, md5_header)，size 和 mtime_ns 都没变的文件直接复用上次
+    结果，几 GB 的 ISO/CHD 重扫时不用再读一遍。
     """
-    with json_path.open("r", encoding="utf-8") as f:
-        payload = json.load(f)
+    payload = _loads(json_path.read_bytes())
 
     hasher = RomHasher(header_bytes=HEADER_BYTES)
 
@@ -98,6 +218,13 @@ def scan_roms_for_platform(
         "roms": [],   # 每个元素是一个 dict
     }
 
+    cache: Dict[str, Any] = _load_hash_cache(cache_path) if cache_path else {}
+    cache_dirty = False
+
+    # 第一遍只建条目，把存在的文件收集起来；哈希放到线程池里并行跑，
+    # read 和 SHA 计算在多个 ROM 之间重叠（多碟共用的文件只算一次）
+    to_hash: Dict[Path, List[Dict[str, Any]]] = {}
+
     for idx, game in enumerate(games):
         game_title: str = game.get("game", "") or ""
         game_id: Optional[str] = game.get("id")  # 若你后面已加 id，这里顺带带上
@@ -115,36 +242,97 @@ def scan_roms_for_platform(
                 continue
 
             full_path = rom_root / rom_rel
+            try:
+                st = full_path.stat()
+                exists = True
+            except OSError:
+                st = None
+                exists = False
             entry: Dict[str, Any] = {
                 "platform": platform,
                 "game_title": game_title,
                 "game_id": game_id,
                 "rom_rel": rom_rel,
                 "rom_path": str(full_path),
-                "exists": full_path.is_file(),
+                "exists": exists,
                 "size": None,
                 "sha256_full": None,
                 "md5_header": None,
                 "header_bytes": HEADER_BYTES,
+                "skipped": None,
             }
 
-
-            if full_path.is_file():
-                size, sha256_full, md5_header = hasher.hash_rom(full_path)
-                entry["size"] = size
-                entry["sha256_full"] = sha256_full
-                entry["md5_header"] = md5_header
+            if exists and rom_rel.lower().endswith(".cue"):
+                # .cue 是纯文本描述文件，hash 对匹配数据库没有意义
+                entry["skipped"] = "cue-descriptor"
+            elif exists:
+                # 缓存命中条件：size 和 mtime_ns 都没变，且 header_bytes
+                # 配置一致（否则 md5_header 语义变了）
+                hit = cache.get(rom_rel)
+                if (
+                    hit
+                    and hit.get("size") == st.st_size
+                    and hit.get("mtime_ns") == st.st_mtime_ns
+                    and hit.get("header_bytes") == HEADER_BYTES
+                ):
+                    entry["size"] = hit["size"]
+                    entry["sha256_full"] = hit.get("sha256_full")
+                    entry["md5_header"] = hit.get("md5_header")
+                else:
+                    entry["_mtime_ns"] = st.st_mtime_ns
+                    to_hash.setdefault(full_path, []).append(entry)
 
             results["roms"].append(entry)
 
+    if to_hash:
+        workers = min(8, len(to_hash), os.cpu_count() or 4)
+        paths = list(to_hash)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            for path, (size, sha256_full, md5_header) in zip(
+                paths, ex.map(hasher.hash_target, paths)
+            ):
+                for entry in to_hash[path]:
+                    mtime_ns = entry.pop("_mtime_ns", None)
+                    entry["size"] = size
+                    entry["sha256_full"] = sha256_full
+                    entry["md5_header"] = md5_header
+                    if cache_path is not None:
+                        cache[entry["rom_rel"]] = {
+                            "size": size,
+                            "mtime_ns": mtime_ns,
+                            "sha256_full": sha256_full,
+                            "md5_header": md5_header,
+                            "header_bytes": HEADER_BYTES,
+                        }
+                        cache_dirty = True
+
+    # 没哈希任何新文件时缓存原样，不白写一遍
+    if cache_path is not None and cache_dirty:
+        _save_hash_cache(cache_path, cache)
+
     return results
 
 
 def save_romhash_db(data: Dict[str, Any], out_path: Path) -> None:
-    """保存 rom 扫描结果为 json."""
+    """保存 rom 扫描结果为 json.
+
+    逐条流式写出 roms 数组，不让 json.dump 对整棵树跑一遍递归编码器；
+    头部字段照常 indent=2，每条 rom 单独 dumps 后缩进拼进去，
+    输出和原来 json.dump(data, indent=2) 字节级等价。
+    """
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    roms = data.get("roms") or []
+    head = {k: v for k, v in data.items() if k != "roms"}
+    with out_path.open("w", encoding="utf-8", buffering=1 << 20) as f:
+        head_txt = json.dumps(head, ensure_ascii=False, indent=2)
+        f.write(head_txt[:-2] + ',\n  "roms": [')
+        first = True
+        for entry in roms:
+            frag = json.dumps(entry, ensure_ascii=False, indent=2)
+            frag = "\n".join("    " + ln for ln in frag.splitlines())
+            f.write(("\n" if first else ",\n") + frag)
+            first = False
+        f.write("]\n}" if first else "\n  ]\n}")
 
 
 def main():
@@ -170,6 +358,11 @@ def main():
         default=None,
         help="输出 romhash db 路径（默认：romdb/<platform>_romhash.json）",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="禁用持久化哈希缓存，强制重算所有文件",
+    )
 
     args = parser.parse_args()
 
@@ -188,7 +381,12 @@ def main():
     print(f"[INFO] jsondb: {json_path}")
     print(f"[INFO] rom_root: {rom_root}")
 
-    results = scan_roms_for_platform(platform, json_path, rom_root)
+    # 缓存文件跟 romhash db 放一起：romdb/<platform>_romhash.cache.json
+    cache_path = None
+    if not args.no_cache:
+        cache_path = Path("romdb") / f"{platform}_romhash.cache.json"
+
+    results = scan_roms_for_platform(platform, json_path, rom_root, cache_path=cache_path)
 
     # 统计一下命中情况
     total = len(results["roms"])
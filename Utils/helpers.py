@@ -1,22 +1,25 @@
+import json
 import os
 import re
+from functools import lru_cache
+
+# 反斜杠统一成斜杠走一次 translate；空格必须在 strip 之后才换下划线，
+# 不然首尾空格会被误变成下划线
+_BACKSLASH_TRANS = str.maketrans({"\\": "/"})
+
 
 def slugify_re(name: str) -> str:
-    s = (
-        name.replace("\\", "/")
-        .split("/")[-1]
-        .strip()
-        .lower()
-        .replace(" ", "_")
-    )
+    s = slugify(name)
     return re.sub(r"[^a-z0-9_]+", "_", s)
 
 
+@lru_cache(maxsize=512)
 def slugify(name: str) -> str:
     # 简单一点就够用：全小写，空格 -> 下划线
+    # 平台名在一次运行里反复出现，lru_cache 直接命中
     return (
-        name.replace("\\", "/")
-        .split("/")[-1]
+        name.translate(_BACKSLASH_TRANS)
+        .rsplit("/", 1)[-1]
         .strip()
         .lower()
         .replace(" ", "_")
@@ -33,24 +36,82 @@ def discover_platforms(resource_root: str = "Resource"):
     """
     platforms = {}
 
-    if not os.path.isdir(resource_root):
+    # scandir 直接带回 getdents 里的类型信息，is_dir 不用再每个条目
+    # 补一次 stat；listdir + isdir 的写法是每个条目两次系统调用
+    try:
+        it = os.scandir(resource_root)
+    except OSError:
         return platforms
 
-    for entry in os.listdir(resource_root):
-        platform_dir = os.path.join(resource_root, entry)
-        if not os.path.isdir(platform_dir):
-            continue
+    with it:
+        for entry in it:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
 
-        meta_path = os.path.join(platform_dir, "metadata.pegasus.txt")
-        if not os.path.isfile(meta_path):
-            continue
+            meta_path = os.path.join(entry.path, "metadata.pegasus.txt")
+            if not os.path.isfile(meta_path):
+                continue
 
-        key = slugify(entry)          # 例如 "DC" -> "dc", "FBNEO ACT" -> "fbneo_act"
-        name = entry                  # 人类可读平台名，保持原文件夹名
-        platforms[key] = (name, meta_path)
+            key = slugify(entry.name) # 例如 "DC" -> "dc", "FBNEO ACT" -> "fbneo_act"
+            name = entry.name         # 人类可读平台名，保持原文件夹名
+            platforms[key] = (name, meta_path)
 
     return platforms
 
+def discover_platforms_cached(
+    resource_root: str = "Resource",
+    out_root: str = "jsondb",
+    refresh: bool = False,
+):
+    """
+    带 sidecar 缓存的 discover_platforms。
+
+    扫描结果存在 <out_root>/.platforms_cache.json，按 Resource 根目录的
+    mtime_ns 校验；命中时只需确认各 meta 文件还在，整个目录扫描都省掉。
+    注意：往已有子目录里新放 metadata.pegasus.txt 不会改根目录 mtime，
+    这种情况用 --refresh-platforms 手动刷新。
+    """
+    cache_path = os.path.join(out_root, ".platforms_cache.json")
+
+    try:
+        root_mtime_ns = os.stat(resource_root).st_mtime_ns
+    except OSError:
+        return {}
+
+    if not refresh:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("root_mtime_ns") == root_mtime_ns:
+                entries = {
+                    k: (v[0], v[1]) for k, v in cached["entries"].items()
+                }
+                # meta 文件被删的情况 mtime 可能骗人，逐个确认一下
+                if all(os.path.isfile(mp) for _, mp in entries.values()):
+                    return entries
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    platforms = discover_platforms(resource_root)
+
+    try:
+        os.makedirs(out_root, exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "root_mtime_ns": root_mtime_ns,
+                    "entries": {k: list(v) for k, v in platforms.items()},
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+    except OSError:
+        pass   # 缓存写不进去照常工作
+
+    return platforms
+
+
 def auto_rom_root_from_meta(meta_path: str, user_rom_root: str | None):
     """
     如果 user_rom_root 显式给了，就用用户的。
@@ -1,18 +1,65 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import hashlib
 import json
 from pathlib import Path
 
+try:
+    import orjson          # 可选依赖：C 实现的 json，读写都快一个量级
+except ImportError:
+    orjson = None
+
 JSONDB_DIR = Path("jsondb")
 AI_DIR = Path("descriptions_ai")   # 你放 *_out.jsonl 的目录
 
+# 已应用补丁的指纹：dict[platform_key][id] = sha256(description)
+# 下次运行时指纹没变的补丁直接跳过，整平台都跳过时连 json 都不读
+APPLIED_PATH = AI_DIR / "applied.json"
+
+
+def _desc_sha(desc: str) -> str:
+    return hashlib.sha256(desc.encode("utf-8")).hexdigest()
+
+
+def _load_applied() -> dict:
+    try:
+        data = json.loads(APPLIED_PATH.read_bytes())
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_applied(applied: dict) -> None:
+    try:
+        APPLIED_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with APPLIED_PATH.open("w", encoding="utf-8") as f:
+            json.dump(applied, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass   # 指纹写不进去只是下次多做点活
+
+
+def _loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _dump_payload(payload, json_path: Path) -> None:
+    if orjson is not None:
+        json_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+    else:
+        with json_path.open("w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
 def load_patches() -> dict:
     """
     从 descriptions_ai/*.jsonl 读取所有改写后的 description。
-    返回 dict[(platform_key, id)] = new_description
+    返回按平台分桶的 dict[platform_key][id] = new_description，
+    apply 的时候整平台没有补丁就能直接跳过文件。
     """
-    patches: dict[tuple[str, str], str] = {}
+    patches: dict[str, dict[str, str]] = {}
 
     for path in sorted(AI_DIR.glob("batch_*_out.jsonl")):
         print(f"[LOAD] {path}")
@@ -21,7 +68,7 @@ def load_patches() -> dict:
                 line = line.strip()
                 if not line:
                     continue
-                obj = json.loads(line)
+                obj = _loads(line)
 
                 platform_key = obj.get("platform_key")
                 gid = obj.get("id")
@@ -30,22 +77,37 @@ def load_patches() -> dict:
                 if not platform_key or not gid:
                     continue
 
-                patches[(platform_key, gid)] = desc
+                patches.setdefault(platform_key, {})[gid] = desc
 
-    print(f"[INFO] 共加载补丁条目: {len(patches)}")
+    total = sum(len(v) for v in patches.values())
+    print(f"[INFO] 共加载补丁条目: {total}")
     return patches
 
 
-def apply_patches(patches: dict[tuple[str, str], str]):
+def apply_patches(patches: dict[str, dict[str, str]]):
     """
     遍历 jsondb/*.json，按 (platform_key, id) 回写 description。
     """
     total_updated = 0
+    applied = _load_applied()
+    applied_dirty = False
 
     for json_path in sorted(JSONDB_DIR.glob("*.json")):
         platform_key = json_path.stem
-        with json_path.open("r", encoding="utf-8") as f:
-            payload = json.load(f)
+
+        # 整个平台都没有补丁：文件连读都不用读，更不会白写一遍
+        pp = patches.get(platform_key)
+        if not pp:
+            continue
+
+        # 按上次应用时记录的指纹过滤：内容没变的补丁不再处理，
+        # 一个平台全部命中指纹时整个文件跳过
+        ap = applied.get(platform_key) or {}
+        pending = {gid: d for gid, d in pp.items() if ap.get(gid) != _desc_sha(d)}
+        if not pending:
+            continue
+
+        payload = _loads(json_path.read_bytes())
 
         changed = False
         games = payload.get("games", [])
@@ -55,21 +117,26 @@ def apply_patches(patches: dict[tuple[str, str], str]):
             if not gid:
                 continue
 
-            key = (platform_key, gid)
-            if key in patches:
-                new_desc = patches[key]
-                old_desc = g.get("description", "")
+            new_desc = pending.get(gid)
+            if new_desc is None:
+                continue
+
+            if new_desc != g.get("description", ""):
+                g["description"] = new_desc
+                changed = True
+                total_updated += 1
 
-                if new_desc != old_desc:
-                    g["description"] = new_desc
-                    changed = True
-                    total_updated += 1
+            # 不管是真写了还是本来就相等，现在都是生效状态，记指纹
+            applied.setdefault(platform_key, {})[gid] = _desc_sha(new_desc)
+            applied_dirty = True
 
         if changed:
-            with json_path.open("w", encoding="utf-8") as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
+            _dump_payload(payload, json_path)
             print(f"[WRITE] 更新 {json_path}")
 
+    if applied_dirty:
+        _save_applied(applied)
+
     print(f"[DONE] 总共更新 description 条目: {total_updated}")
 
 
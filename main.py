@@ -1,20 +1,136 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import argparse
+import os
+import sys
 from pathlib import Path
 
-from Tools.export_to_json import export_platform_to_json
-from Utils.helpers import discover_platforms
-from Tools.base import verify_closure
-from Tools.json_to_metadata import json_to_metadata
+# argparse / 各导出器都按需在分支里 import：
+# `python main.py [key]` 这种最常见的调用连 argparse 都不用付，
+# --list 也不再预热三个前端导出器。
 
-from Converters.daijisho_exporter import export_daijisho
-from Converters.esde_exporter import export_esde
-from Converters.retroarch_exporter import export_retroarch
+
+def _run_parallel(fn, tasks, jobs):
+    """把 (args...) 任务列表撒到进程池上，按完成顺序收结果。
+
+    解析/正则都是纯 Python CPU 活，线程池吃不到并行，进程池才行；
+    jobs<=1 或只有一个任务时直接串行，省掉起进程的开销。
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        return [fn(*t) for t in tasks]
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    results = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as ex:
+        futures = [ex.submit(fn, *t) for t in tasks]
+        for fut in as_completed(futures):
+            results.append(fut.result())
+    return results
+
+
+def _verify_one(key, name, meta_path, dump_failing=False):
+    from Tools.base import verify_closure, verify_closure_inmem
+
+    # 纯内存 round-trip：不写 _norm_test 临时文件
+    ok = verify_closure_inmem(meta_path)
+    if not ok and dump_failing:
+        # 失败时才按需落盘一份规范化输出，便于 diff 调试
+        verify_closure(meta_path, keep_temp=True)
+    return key, name, ok
+
+
+def _restore_one(key, json_path):
+    from Tools.json_to_metadata import json_to_metadata
+
+    out_path = json_to_metadata(key, json_path, output_root="CanonicalMetadata")
+    return key, out_path
+
+
+def _frontend_up_to_date(json_path, out_file):
+    """前端输出比 jsondb 新（或同龄）即视为最新，可整平台跳过。"""
+    try:
+        return out_file.stat().st_mtime_ns >= json_path.stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+def _export_frontends_one(key, out_root, do_daijisho, do_esde, do_ra,
+                          force=False):
+    json_path = Path(out_root) / f"{key}.json"
+    if not json_path.exists():
+        print(f"[WARN] 跳过 {key}，未找到 jsondb 文件：{json_path}")
+        return key, False
+
+    if do_daijisho:
+        out_file = Path("Export_Daijisho") / f"{key}.json"
+        if not force and _frontend_up_to_date(json_path, out_file):
+            print(f"[SKIP] Daijisho {key} 已是最新 -> {out_file}")
+        else:
+            from Converters.daijisho_exporter import export_daijisho
+
+            export_daijisho(key, json_path, Path("Export_Daijisho"))
+    if do_esde:
+        out_file = Path("Export_ESDE") / "gamelists" / key / "gamelist.xml"
+        if not force and _frontend_up_to_date(json_path, out_file):
+            print(f"[SKIP] ES-DE {key} 已是最新 -> {out_file}")
+        else:
+            from Converters.esde_exporter import export_esde
+
+            export_esde(key, json_path, Path("Export_ESDE"))
+    if do_ra:
+        # RetroArch 导出自带逐 cfg 内容哈希缓存，无需整平台 mtime 跳过
+        from Converters.retroarch_exporter import export_retroarch
+
+        export_retroarch(key, json_path, Path("Export_RetroArch"))
+    return key, True
+
+
+def _missing_target(target, platforms):
+    print(f"[ERROR] 找不到平台 key: {target}")
+    print("可用平台（--list 查看详情）：")
+    for k in sorted(platforms.keys()):
+        print("  ", k)
+
+
+def run_default_export(target, resource_root="Resource", out_root="jsondb",
+                       refresh=False, force=False):
+    """默认行为：Pegasus metadata -> jsondb（argparse 快路径直达这里）。"""
+    from Tools.export_to_json import export_all_platforms, export_platform_to_json
+    from Utils.helpers import discover_platforms_cached
+
+    platforms = discover_platforms_cached(resource_root, out_root, refresh=refresh)
+    if not platforms:
+        print(f"[WARN] 在 {resource_root} 下没有找到任何 metadata.pegasus.txt")
+        return
+
+    if target == "all":
+        for key, (name, _) in sorted(platforms.items()):
+            print(f"[INFO] 导出 {key} ({name}) 到 jsondb ...")
+        # 批量导出共享一个线程池（ROM 根目录沿用 metadata 所在目录）
+        for out_path in export_all_platforms(platforms, out_root=out_root, force=force):
+            print(f"       -> {out_path}")
+    else:
+        if target not in platforms:
+            _missing_target(target, platforms)
+            return
+
+        name, meta_path = platforms[target]
+        print(f"[INFO] 导出 {target} ({name}) 到 jsondb ...")
+        rom_root = str(Path(meta_path).parent)
+        out_path = export_platform_to_json(target, name, meta_path, out_root=out_root, rom_root=rom_root, force=force)
+        print(f"[OK] -> {out_path}")
 
 
 def main():
+    # 快路径：`python main.py` / `python main.py <key|all>`（没有任何 flag）
+    # 连 argparse 的构建/解析都跳过
+    argv = sys.argv[1:]
+    if not argv:
+        return run_default_export("all")
+    if len(argv) == 1 and not argv[0].startswith("-"):
+        return run_default_export(argv[0])
+
+    import argparse
     parser = argparse.ArgumentParser(description="Pegasus metadata / jsondb 工具")
     parser.add_argument(
         "target",
@@ -37,11 +153,32 @@ def main():
         action="store_true",
         help="仅列出可用平台，不导出",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="无视增量跳过（.stamp / 输出 mtime），强制重新导出",
+    )
+    parser.add_argument(
+        "--refresh-platforms",
+        action="store_true",
+        help="忽略平台扫描缓存，强制重扫 Resource 目录",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 4,
+        help="target=all 时的并行进程数（默认 CPU 核数；1 = 串行）",
+    )
     parser.add_argument(
         "--verify",
         action="store_true",
         help="执行闭合性验证：parse → dump → parse 是否保持一致",
     )
+    parser.add_argument(
+        "--dump-failing",
+        action="store_true",
+        help="--verify 失败时把规范化 dump 写到 _norm_test 目录供调试",
+    )
 
     # jsondb -> CanonicalMetadata（写回 Pegasus）
     parser.add_argument(
@@ -69,7 +206,11 @@ def main():
 
     args = parser.parse_args()
 
-    platforms = discover_platforms(args.resource_root)
+    from Utils.helpers import discover_platforms_cached
+
+    platforms = discover_platforms_cached(
+        args.resource_root, args.out_root, refresh=args.refresh_platforms
+    )
     if not platforms:
         print(f"[WARN] 在 {args.resource_root} 下没有找到任何 metadata.pegasus.txt")
         return
@@ -86,10 +227,12 @@ def main():
         print("[TEST] 正在验证闭合性 (parse → dump → parse)...")
 
         if args.target == "all":
+            tasks = [
+                (key, name, meta_path, args.dump_failing)
+                for key, (name, meta_path) in sorted(platforms.items())
+            ]
             all_ok = True
-            for key, (name, meta_path) in sorted(platforms.items()):
-                print(f"[TEST] 平台 {key} ({name}) ...")
-                ok = verify_closure(meta_path)
+            for key, name, ok in _run_parallel(_verify_one, tasks, args.jobs):
                 if ok:
                     print(f"[OK] {key} 闭合性成立")
                 else:
@@ -101,13 +244,10 @@ def main():
                 print("[WARN] 部分平台闭合性失败，请检查上方日志")
         else:
             if args.target not in platforms:
-                print(f"[ERROR] 找不到平台 key: {args.target}")
-                print("可用平台（--list 查看详情）：")
-                for k in sorted(platforms.keys()):
-                    print("  ", k)
+                _missing_target(args.target, platforms)
                 return
             name, meta_path = platforms[args.target]
-            ok = verify_closure(meta_path)
+            _, _, ok = _verify_one(args.target, name, meta_path, args.dump_failing)
             if ok:
                 print(f"[OK] {args.target} ({name}) 闭合性成立")
             else:
@@ -118,11 +258,12 @@ def main():
     # 3) jsondb -> CanonicalMetadata（写回 Pegasus）
     if args.export_pegasus:
         if args.target == "all":
-            for key, (name, _) in sorted(platforms.items()):
-                json_path = Path(args.out_root) / f"{key}.json"
-                print(f"[INFO] 从 {json_path} 恢复 {key} ...")
-                out_path = json_to_metadata(key, json_path, output_root="CanonicalMetadata")
-                print(f"       -> {out_path}")
+            tasks = [
+                (key, Path(args.out_root) / f"{key}.json")
+                for key in sorted(platforms)
+            ]
+            for key, out_path in _run_parallel(_restore_one, tasks, args.jobs):
+                print(f"[OK] {key} -> {out_path}")
         else:
             key = args.target
             json_path = Path(args.out_root) / f"{key}.json"
@@ -130,61 +271,37 @@ def main():
                 print(f"[ERROR] 找不到 json: {json_path}")
                 return
             print(f"[INFO] 从 {json_path} 恢复 {key} ...")
-            out_path = json_to_metadata(key, json_path, output_root="CanonicalMetadata")
+            _, out_path = _restore_one(key, json_path)
             print(f"[OK] -> {out_path}")
         return
 
     # 4) jsondb -> Daijisho / ES-DE / RetroArch
     if args.export_daijisho or args.export_esde or args.export_ra:
-        def do_exports_for_key(key: str):
-            json_path = Path(args.out_root) / f"{key}.json"
-            if not json_path.exists():
-                print(f"[WARN] 跳过 {key}，未找到 jsondb 文件：{json_path}")
-                return
-
-            if args.export_daijisho:
-                export_daijisho(key, json_path, Path("Export_Daijisho"))
-            if args.export_esde:
-                export_esde(key, json_path, Path("Export_ESDE"))
-            if args.export_ra:
-                export_retroarch(key, json_path, Path("Export_RetroArch"))
+        flags = (args.export_daijisho, args.export_esde, args.export_ra)
 
         if args.target == "all":
-            for key, (name, _) in sorted(platforms.items()):
-                print(f"[INFO] 从 jsondb 导出 {key} ...")
-                do_exports_for_key(key)
+            tasks = [
+                (key, args.out_root, *flags, args.force)
+                for key in sorted(platforms)
+            ]
+            for key, done in _run_parallel(_export_frontends_one, tasks, args.jobs):
+                if done:
+                    print(f"[OK] 已从 jsondb 导出 {key}")
         else:
             if args.target not in platforms:
-                print(f"[ERROR] 找不到平台 key: {args.target}")
-                print("可用平台（--list 查看详情）：")
-                for k in sorted(platforms.keys()):
-                    print("  ", k)
+                _missing_target(args.target, platforms)
                 return
             print(f"[INFO] 从 jsondb 导出 {args.target} ...")
-            do_exports_for_key(args.target)
+            _export_frontends_one(args.target, args.out_root, *flags,
+                                  force=args.force)
 
         return
 
     # 5) 默认行为：Pegasus metadata -> jsondb
-    if args.target == "all":
-        for key, (name, meta_path) in sorted(platforms.items()):
-            print(f"[INFO] 导出 {key} ({name}) 到 jsondb ...")
-            rom_root = str(Path(meta_path).parent)   # ✅ 用 metadata 所在目录
-            out_path = export_platform_to_json(key, name, meta_path, out_root=args.out_root,  rom_root=rom_root, )
-            print(f"       -> {out_path}")
-    else:
-        if args.target not in platforms:
-            print(f"[ERROR] 找不到平台 key: {args.target}")
-            print("可用平台（--list 查看详情）：")
-            for k in sorted(platforms.keys()):
-                print("  ", k)
-            return
-
-        name, meta_path = platforms[args.target]
-        print(f"[INFO] 导出 {args.target} ({name}) 到 jsondb ...")
-        rom_root = str(Path(meta_path).parent)
-        out_path = export_platform_to_json(args.target, name, meta_path, out_root=args.out_root, rom_root=rom_root, )
-        print(f"[OK] -> {out_path}")
+    run_default_export(
+        args.target, args.resource_root, args.out_root,
+        refresh=args.refresh_platforms, force=args.force,
+    )
 
 
 if __name__ == "__main__":
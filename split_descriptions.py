@@ -1,8 +1,21 @@
 # split_descriptions.py
-
-lines = open("descriptions_raw.jsonl", encoding="utf-8").read().splitlines()
+# 把 descriptions_raw.jsonl 按 batch_size 行切成 batch_NNN.jsonl。
+# 逐行流式读写：不再把整个文件 read().splitlines() 进内存，
+# 峰值内存只有一行；文件句柄也都正常关闭。
 
 batch_size = 40
-for i in range(0, len(lines), batch_size):
-    batch = lines[i:i+batch_size]
-    open(f"batch_{i//batch_size:03d}.jsonl", "w", encoding="utf-8").write("\n".join(batch))
+
+with open("descriptions_raw.jsonl", "rb") as fin:
+    fout = None
+    count = 0
+    try:
+        for line in fin:
+            if count % batch_size == 0:
+                if fout is not None:
+                    fout.close()
+                fout = open(f"batch_{count // batch_size:03d}.jsonl", "wb")
+            fout.write(line)
+            count += 1
+    finally:
+        if fout is not None:
+            fout.close()